@@ -3,14 +3,15 @@ from typing import Optional
 
 import cv2
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-
-import rasterio
-import os
 
+from .patch_reader import WindowedPatchReader
+from .palette import SATELLITE_PALETTE, UAV_PALETTE
 from .process_result import ProcessResult
-from utils.common import resource_path
+from .raster_io import ClassRaster
+from .reconstruction import ArraySink, GeoTiffSink, MemmapSink, StripReconstructor, ProbabilityStripReconstructor, reconstruct
+from logic.inference.model_registry import model_registry
+from logic.inference.parallel import ParallelPredictor
+from utils.common import get_file_extension
 from utils.logger import setup_logger
 from utils.enum import ImageSource
 
@@ -21,138 +22,129 @@ class ClassificationBgProcess(QThread):
     result = pyqtSignal(dict)
     error = pyqtSignal(str)
 
-    def __init__(self,image_path: str, image_source: ImageSource, parent : Optional[QObject] = None) -> None:
+    def __init__(
+            self,
+            image_path: str,
+            image_source: ImageSource,
+            batch_size: int = 32,
+            mask_path: Optional[str] = None,
+            blending: str = "probability",
+            backend: str = "keras",
+            precision: str = "float32",
+            num_workers: int = 0,
+            parent : Optional[QObject] = None
+        ) -> None:
         super().__init__(parent)
         self.image_path = image_path
         self.image_source = image_source
+        self.batch_size = batch_size
+        # jika diisi, mask hasil rekonstruksi ditulis ke file (hemat memori):
+        # .tif/.tiff = GeoTIFF ber-georeferensi, ekstensi lain = memmap
+        self.mask_path = mask_path
+        # "probability" (blending softmax per kelas) atau "label" (blending indeks kelas)
+        self.blending = blending
+        # "keras", "onnx" atau "tflite" (lihat logic/inference/export.py)
+        self.backend = backend
+        # "float32", atau "float16"/"int8" untuk model tflite hasil logic/inference/quantize.py
+        self.precision = precision
+        # > 0: inferensi dibagi ke beberapa proses (lihat logic/inference/parallel.py)
+        self.num_workers = num_workers
 
     def normalize_image(self, image):
         return image.astype(np.float32) / 255.0
 
-    def load_image(self, image_path):
-        if self.image_source == ImageSource.UAV.value:
-            with rasterio.open(image_path) as src:
-                logger.info(f"📷 Membaca TIFF: {image_path}")
-                logger.info(f"🛰 Jumlah band tersedia: {src.count}")
-
-                if src.count < 3:
-                    raise ValueError("Gambar memiliki kurang dari 3 band, tidak bisa diolah sebagai RGB.")
-
-                image = np.stack([src.read(b) for b in [1, 2, 3]], axis=-1)
-
-                if image.dtype != np.uint8:
-                    image = np.clip(image / image.max() * 255, 0, 255).astype(np.uint8)
-        else:
-                image = cv2.imread(image_path)
-                if image is None:
-                    raise ValueError(f"Gagal memuat gambar")
-
-        return image, image.shape[:2]  # (H, W)
-
     # ================================
     # 2️⃣ Patching dengan Overlap
     # ================================
 
-    def extract_patches(self, image, patch_size=256, overlap=128):
-        h, w, c = image.shape
-        step = patch_size - overlap
-        patches = []
-        positions = []
-
-        for y in range(0, h, step):
-            for x in range(0, w, step):
-                patch = image[y:y+patch_size, x:x+patch_size]
-                h_patch, w_patch = patch.shape[:2]
-
-                if h_patch < patch_size or w_patch < patch_size:
-                    patch_padded = np.zeros((patch_size, patch_size, 3), dtype=np.uint8)
-                    patch_padded[:h_patch, :w_patch] = patch
-                    patch = patch_padded
-
-                patches.append(patch)
-                positions.append((y, x))
-
-        return np.array(patches), positions, (h, w)
+    def open_image(self, image_path, patch_size=256, overlap=128):
+        # Citra satelit diproses dalam urutan BGR (sama seperti cv2.imread saat training)
+        if self.image_source == ImageSource.UAV.value:
+            return WindowedPatchReader(image_path, bands=(1, 2, 3), patch_size=patch_size, overlap=overlap)
+        # konversi 8-bit sama seperti cv2.imread (bukan skala terhadap nilai maksimum)
+        return WindowedPatchReader(image_path, bands=(3, 2, 1), patch_size=patch_size, overlap=overlap, stretch="opencv")
 
     # ================================
     # 3️⃣ Prediksi Patch
     # ================================
 
-    def predict_patched_image(self, model, image_path, patch_size=256, overlap=128):
-        num_classes = 5 if self.image_source == ImageSource.SATELLITE.value else 4
-        image, original_size = self.load_image(image_path)
-        patches, positions, padded_size = self.extract_patches(image, patch_size, overlap)
-        
-        predictions = []
+    def predict_patches(self, model, reader):
+        output = "probabilities" if self.blending == "probability" else "argmax"
+        for positions, batch in reader.batches(self.batch_size):
+            prediction = model.predict(self.normalize_image(batch), output=output)
+            yield from zip(positions, prediction)
+
+    def predict_patches_parallel(self, reader, num_classes):
+        output = "probabilities" if self.blending == "probability" else "argmax"
+        batches = ((positions, self.normalize_image(batch)) for positions, batch in reader.batches(self.batch_size))
+        input_shape = (reader.patch_size, reader.patch_size, len(reader.bands))
 
-        for patch in patches:
-            patch_input = self.normalize_image(patch)
-            patch_input = np.expand_dims(patch_input, axis=0)
-            prediction = model.predict(patch_input, verbose=0)
-            predicted_mask = np.argmax(prediction, axis=-1)[0]
-            predictions.append(predicted_mask)
+        with ParallelPredictor(
+            self.image_source, input_shape, num_classes, self.batch_size, output,
+            self.backend, self.precision, self.num_workers
+        ) as predictor:
+            yield from predictor.predict(batches)
 
-        predictions = np.array(predictions)
-        reconstructed_mask = self.reconstruct_from_patches(predictions, positions, padded_size, num_classes, patch_size, overlap)
+    def predict_patched_image(self, model, image_path, patch_size=256, overlap=128):
+        num_classes = 5 if self.image_source == ImageSource.SATELLITE.value else 4
+        with self.open_image(image_path, patch_size, overlap) as reader:
+            if self.num_workers:
+                predictions = self.predict_patches_parallel(reader, num_classes)
+            else:
+                predictions = self.predict_patches(model, reader)
+            reconstructed_mask = self.reconstruct_from_patches(
+                predictions, (reader.height, reader.width), num_classes, patch_size, overlap, reader.src.profile)
 
-        return reconstructed_mask[:original_size[0], :original_size[1]]
+        return reconstructed_mask
 
     # ================================
     # 4️⃣ Rekonstruksi Blending
     # ================================
 
-    def reconstruct_from_patches(self, patches, positions, padded_size, num_classes, patch_size=256, overlap=128):
-        h, w = padded_size
-        step = patch_size - overlap
-
-        reconstructed = np.zeros((h, w), dtype=np.float32)
-        weight = np.zeros((h, w), dtype=np.float32)
-
-        for index, ((y, x), patch) in enumerate(zip(positions, patches)):
-            h_patch, w_patch = patch.shape
-
-            h_patch = min(h_patch, h - y)
-            w_patch = min(w_patch, w - x)
-
-            alpha = np.ones((h_patch, w_patch), dtype=np.float32)
-            if x > 0:
-                alpha[:, :min(overlap, w_patch)] *= np.linspace(0.2, 1, min(overlap, w_patch))[None, :]
-            if y > 0:
-                alpha[:min(overlap, h_patch), :] *= np.linspace(0.2, 1, min(overlap, h_patch))[:, None]
-
-            reconstructed[y:y+h_patch, x:x+w_patch] += patch[:h_patch, :w_patch] * alpha
-            weight[y:y+h_patch, x:x+w_patch] += alpha
-
-        reconstructed /= np.maximum(weight, 1)
-
-        reconstructed = np.clip(reconstructed, 0, num_classes - 1).astype(np.uint8)
+    def create_mask_sink(self, height, width, profile=None):
+        if self.mask_path is None:
+            return ArraySink(height, width)
+        if get_file_extension(self.mask_path) in ("tif", "tiff"):
+            return GeoTiffSink(self.mask_path, profile or {"width": width, "height": height})
+        return MemmapSink(self.mask_path, height, width)
+
+    def as_class_array(self, mask):
+        """Sink result as an array-like; the GeoTIFF written by GeoTiffSink is read window by window."""
+        return ClassRaster(mask) if isinstance(mask, str) else mask
+
+    def reconstruct_from_patches(self, predictions, image_size, num_classes, patch_size=256, overlap=128, profile=None):
+        h, w = image_size
+        sink = self.create_mask_sink(h, w, profile)
+        if self.blending == "probability":
+            reconstructor = ProbabilityStripReconstructor(h, w, num_classes, sink, patch_size, overlap)
+        else:
+            reconstructor = StripReconstructor(h, w, num_classes, sink, patch_size, overlap)
 
-        return reconstructed
+        return reconstruct(predictions, reconstructor)
 
     # ================================
     # 5️⃣ Dekoding Mask 
     # ================================
 
     def decode_segmentation_mask(self, mask):
-        # Warna Kelas (RGB)
-        colors = {
-            'ground': [167, 168, 167],  # Abu-abu
-            'hutan': [21, 194, 59],     # Hijau
-            'palmoil': [46, 15, 15],    # Coklat
-            'urban': [237, 92, 14],     # Orange
-            'vegetation': [102, 237, 69]  # Hijau terang
-        }
-        if self.image_source == ImageSource.UAV.value:
-            colors.pop("urban", None)
-
-        class_colors = list(colors.values())
-
-        seg_img = np.zeros((mask.shape[0], mask.shape[1], 3), dtype=np.uint8)
-        
-        for i, color in enumerate(class_colors):
-            seg_img[mask == i] = color
-        
-        return seg_img
+        palette = UAV_PALETTE if self.image_source == ImageSource.UAV.value else SATELLITE_PALETTE
+        return palette.encode(mask)
+
+    def to_satellite_classes(self, mask, chunk_rows: int = 1024):
+        """
+        Class IDs used by ProcessResult (UAV has no urban class, its vegetation is 3 instead of 4).
+        Translated in place block by block, so memmap and GeoTIFF masks are never copied whole.
+        """
+        if self.image_source != ImageSource.UAV.value:
+            return mask
+
+        translate = lambda block: SATELLITE_PALETTE.translate(block, UAV_PALETTE)
+        if isinstance(mask, ClassRaster):
+            mask.map_blocks(translate)
+        else:
+            for row in range(0, mask.shape[0], chunk_rows):
+                mask[row:row + chunk_rows] = translate(mask[row:row + chunk_rows])
+        return mask
 
     # ================================
     # 6️⃣ Simpan Hasil
@@ -174,29 +166,29 @@ class ClassificationBgProcess(QThread):
     def run(self):
         try:
             self.progress.emit("Memuat model...")
-            if self.image_source == ImageSource.SATELLITE.value:
-                model_path = os.path.join("logic", "classification", "model", "best_model_fix.h5")
-            else:
-                model_path = os.path.join("logic", "classification", "model", "best_model_100e.h5")
-            model = load_model(resource_path(model_path), compile=False)
+            # mode multi-proses: model dimuat oleh masing-masing worker
+            model = None if self.num_workers else model_registry.get(self.image_source, self.backend, self.precision)
 
             self.progress.emit("Melakukan prediksi...")
-            mask = self.predict_patched_image(model, self.image_path)
+            mask = self.as_class_array(self.predict_patched_image(model, self.image_path))
             
             # self.progress.emit("Menyimpan hasil segmentasi...")
-            image = self.decode_segmentation_mask(mask)
+            class_array = self.to_satellite_classes(mask)
             self.progress.emit("Berhasil menyelesaikan proses prediksi...")
 
             self.progress.emit("Hitung luas area...")
-            process = ProcessResult(self.image_path, image=image)
+            process = ProcessResult(self.image_path, class_array=class_array)
             total_area = process.calculate_area()
+            image, preview_scale = process.preview()
             self.progress.emit("Proses klasifikasi selesai...")
             self.result.emit({
                 "total_area": total_area,
-                "gdf": process.gdf, 
+                # poligon dibuat oleh SaveWorker saat ekspor
+                "gdf": None, 
                 "meta": process.meta, 
                 "class_array": process.class_array,
                 "image": image,
+                "preview_scale": preview_scale,
             })
         except Exception as e:
             self.error.emit(str(e))
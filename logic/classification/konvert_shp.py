@@ -1,12 +1,10 @@
 import rasterio
 import numpy as np
-import geopandas as gpd
-from rasterio.features import shapes
-from shapely.geometry import shape
-from scipy.spatial import cKDTree
 from PIL import Image
 import argparse
 
+from polygonize import CLEANUP_METHODS, REASSIGN_METHODS, polygonize, reassign_small_polygons, sieve
+
 # =====================
 # load CRS input tif
 # =====================
@@ -45,31 +43,11 @@ def save_geotiff(output_tif, class_array, meta, nodata_value):
         dst.write(class_array, 1)
     print(f"GeoTIFF berhasil disimpan: {output_tif}")
 
-def generate_polygons(class_array, transform, class_labels):
-    shapes_gen = shapes(class_array, transform=transform)
-    polygons, values, labels = [], [], []
-    for geom, value in shapes_gen:
-        poly = shape(geom).buffer(1).buffer(-1)  
-        polygons.append(poly)
-        values.append(value)
-        labels.append(class_labels.get(value, "Unknown"))
-    return polygons, values, labels
-
-def create_geodataframe(polygons, values, labels, crs):
-    return gpd.GeoDataFrame({"class": values, "label": labels, "geometry": polygons}, crs=crs)
-
-def interpolate_small_polygons(gdf, min_area_threshold=200):
-    small_polygons = gdf[gdf.geometry.area < min_area_threshold]
-    large_polygons = gdf[gdf.geometry.area >= min_area_threshold]
-    if not small_polygons.empty and not large_polygons.empty:
-        small_centroids = np.array([geom.centroid.coords[0] for geom in small_polygons.geometry])
-        large_centroids = np.array([geom.centroid.coords[0] for geom in large_polygons.geometry])
-        tree = cKDTree(large_centroids)
-        _, indices = tree.query(small_centroids)
-        for small_idx, large_idx in zip(small_polygons.index, indices):
-            gdf.at[small_idx, "class"] = large_polygons.iloc[large_idx]["class"]
-            gdf.at[small_idx, "label"] = large_polygons.iloc[large_idx]["label"]
-    return gdf
+def generate_polygons(class_array, transform, crs, class_labels, cleanup="buffer"):
+    return polygonize(class_array, transform, crs, class_labels, cleanup=cleanup)
+
+def interpolate_small_polygons(gdf, min_area_threshold=200, method="centroid"):
+    return reassign_small_polygons(gdf, min_area_threshold, method)
 
 # =====================
 # hitung luas per kelas
@@ -94,15 +72,16 @@ def save_shapefile(gdf, output_shp):
     gdf.to_file(output_shp)
     print(f"Shapefile berhasil disimpan: {output_shp}")
 
-def main(input_tif, input_png, output_tif, output_shp, decoded_classes, class_labels, nodata_value=255):
+def main(input_tif, input_png, output_tif, output_shp, decoded_classes, class_labels, nodata_value=255, cleanup="buffer", reassign="centroid", sieve_area=0):
     meta, transform, crs = load_metadata(input_tif)
     segmentasi_array = load_segmentation_image(input_png)
     class_array = decode_segmentation(segmentasi_array, decoded_classes)
     save_geotiff(output_tif, class_array, meta, nodata_value)
     
-    polygons, values, labels = generate_polygons(class_array, transform, class_labels)
-    gdf = create_geodataframe(polygons, values, labels, crs)
-    gdf = interpolate_small_polygons(gdf)
+    if sieve_area:
+        class_array = sieve(class_array, transform, crs, sieve_area)
+    gdf = generate_polygons(class_array, transform, crs, class_labels, cleanup)
+    gdf = interpolate_small_polygons(gdf, method=reassign)
     
     print("Menghitung luas...")
     calculate_area(gdf)
@@ -116,6 +95,9 @@ if __name__ == "__main__":
     parser.add_argument("--input_png", type=str, required=True,) # untuk acuan warna kelas segmentasi
     parser.add_argument("--output_tif", type=str, required=True,)
     parser.add_argument("--output_shp", type=str, required=True,)
+    parser.add_argument("--cleanup", type=str, default="buffer", choices=CLEANUP_METHODS) # pembersihan geometri
+    parser.add_argument("--reassign", type=str, default="centroid", choices=REASSIGN_METHODS) # kelas poligon kecil
+    parser.add_argument("--sieve_area", type=float, default=0) # luas minimum region (satuan peta) sebelum poligonisasi
 
     args = parser.parse_args()
     
@@ -134,4 +116,4 @@ if __name__ == "__main__":
         4: 'vegetation'
     }
 
-    main(args.tif, args.png, args.output_tif, args.output_shp, decoded_classes, class_labels)
+    main(args.tif, args.png, args.output_tif, args.output_shp, decoded_classes, class_labels, cleanup=args.cleanup, reassign=args.reassign, sieve_area=args.sieve_area)
@@ -0,0 +1,92 @@
+import numpy as np
+
+# Warna kelas (RGB), urutan = ID kelas model satelit
+SATELLITE_COLORS = {
+    0: (167, 168, 167),  # ground
+    1: (21, 194, 59),    # hutan
+    2: (46, 15, 15),     # palmoil
+    3: (237, 92, 14),    # urban
+    4: (102, 237, 69),   # vegetation
+}
+
+# model UAV tidak punya kelas urban, kelas 3 = vegetation
+UAV_COLORS = {
+    0: SATELLITE_COLORS[0],
+    1: SATELLITE_COLORS[1],
+    2: SATELLITE_COLORS[2],
+    3: SATELLITE_COLORS[4],
+}
+
+SENTINEL_COLORS = {
+    0: (0, 0, 0),        # NO_DATA
+    1: (167, 168, 167),  # GROUND
+    2: (46, 15, 15),     # PALMOIL
+    3: (102, 237, 69),   # VEGETASI
+}
+
+def pack_rgb(rgb):
+    """Pack an (..., 3) uint8 RGB array into uint32 keys 0xRRGGBB."""
+    # operand shift uint32 agar hasil tidak dipromosikan ke int64 (numpy < 1.24)
+    r = rgb[..., 0].astype(np.uint32) << np.uint32(16)
+    g = rgb[..., 1].astype(np.uint32) << np.uint32(8)
+    return r | g | rgb[..., 2].astype(np.uint32)
+
+class Palette:
+    """
+    Class ID <-> RGB conversion through lookup tables.
+
+    Encoding indexes a 256-entry color table with the class array. Decoding packs each pixel
+    into a 24-bit key and indexes a dense 2^24 table (16 MB, built on first use), so both
+    directions are a single pass over the image regardless of the number of classes.
+    """
+
+    def __init__(self, colors: dict, default_class: int = 0):
+        self.colors = colors
+        self.default_class = default_class
+
+        self.color_lut = np.zeros((256, 3), dtype=np.uint8)
+        for class_id, color in colors.items():
+            self.color_lut[class_id] = color
+
+        self._class_lut = None
+
+    @property
+    def class_lut(self):
+        if self._class_lut is None:
+            self._class_lut = np.full(1 << 24, self.default_class, dtype=np.uint8)
+            for class_id, color in self.colors.items():
+                self._class_lut[pack_rgb(np.array(color, dtype=np.uint8))] = class_id
+        return self._class_lut
+
+    def encode(self, class_array):
+        """Class array (H, W) -> RGB image (H, W, 3). Classes without a color become black."""
+        return self.color_lut[class_array]
+
+    def translate(self, class_array, source: "Palette"):
+        """Map class IDs of another palette to the IDs of this one by color (e.g. UAV 3 -> satellite 4)."""
+        ids = {color: class_id for class_id, color in self.colors.items()}
+        lut = np.full(256, self.default_class, dtype=np.uint8)
+        for class_id, color in source.colors.items():
+            lut[class_id] = ids.get(color, self.default_class)
+        return lut[class_array]
+
+    def decode(self, rgb, chunk_rows: int = 1024):
+        """RGB image (H, W, 3) -> class array (H, W). Unknown colors become default_class."""
+        class_array = np.empty(rgb.shape[:2], dtype=np.uint8)
+        # per blok baris agar key uint32 sementara tidak sebesar seluruh citra
+        for row in range(0, rgb.shape[0], chunk_rows):
+            class_array[row:row + chunk_rows] = self.class_lut[pack_rgb(rgb[row:row + chunk_rows])]
+        return class_array
+
+def preview_image(class_array, palette: Palette, max_size: int = 2048):
+    """
+    Colored preview no larger than max_size on its longest side. Returns (rgb, scale), where
+    scale is the factor that maps the preview back onto the full-resolution raster.
+    """
+    scale = max(1, -(-max(class_array.shape[:2]) // max_size))
+    # nearest (stride) agar tidak tercampur warna antar kelas
+    return palette.encode(class_array[::scale, ::scale]), scale
+
+SATELLITE_PALETTE = Palette(SATELLITE_COLORS)
+UAV_PALETTE = Palette(UAV_COLORS)
+SENTINEL_PALETTE = Palette(SENTINEL_COLORS)
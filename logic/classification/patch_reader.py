@@ -0,0 +1,112 @@
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+class WindowedPatchReader:
+    """
+    Reads overlapping patches from a raster on demand, one window at a time.
+
+    stretch converts non-uint8 rasters to 0-255: True scales by the global maximum (UAV),
+    "opencv" reproduces cv2.imread's 8-bit conversion (16-bit / 256, other types saturated),
+    False keeps the raw values.
+    """
+
+    def __init__(self, image_path: str, bands=(1, 2, 3), patch_size: int = 256, overlap: int = 128, stretch=True):
+        self.image_path = image_path
+        # None = semua band pada raster
+        self.bands = list(bands) if bands is not None else None
+        self.patch_size = patch_size
+        self.step = patch_size - overlap
+        self.stretch = stretch
+
+        self.src = None
+        self.scale = None
+
+    def __enter__(self):
+        self.src = rasterio.open(self.image_path)
+        logger.info(f"📷 Membaca TIFF: {self.image_path}")
+        logger.info(f"🛰 Jumlah band tersedia: {self.src.count}")
+
+        if self.bands is None:
+            self.bands = list(range(1, self.src.count + 1))
+
+        if self.src.count < max(self.bands):
+            self.src.close()
+            raise ValueError(f"Gambar memiliki kurang dari {max(self.bands)} band, tidak bisa diolah.")
+
+        self.scale = self.compute_scale()
+        return self
+
+    def __exit__(self, *args):
+        self.src.close()
+
+    def __len__(self):
+        return len(self.positions())
+
+    @property
+    def height(self):
+        return self.src.height
+
+    @property
+    def width(self):
+        return self.src.width
+
+    @property
+    def dtype(self):
+        return np.uint8 if self.stretch else np.dtype(self.src.dtypes[0])
+
+    def compute_scale(self):
+        """Scale factor that stretches non-uint8 data to 0-255, computed block by block."""
+        if not self.stretch or self.src.dtypes[0] == "uint8":
+            return None
+        if self.stretch == "opencv":
+            return 1 / 256 if self.src.dtypes[0] in ("uint16", "int16") else 1.0
+
+        max_value = 0
+        for _, window in self.src.block_windows(1):
+            max_value = max(max_value, self.src.read(self.bands, window=window).max())
+        return 255.0 / max_value if max_value else 1.0
+
+    def positions(self):
+        return [(y, x) for y in range(0, self.height, self.step) for x in range(0, self.width, self.step)]
+
+    def read_patch(self, y, x, out=None):
+        """Read the patch whose top-left corner is (y, x), zero padded at the image edges."""
+        if out is None:
+            out = np.zeros((self.patch_size, self.patch_size, len(self.bands)), dtype=self.dtype)
+        else:
+            out[:] = 0
+
+        window = Window(col_off=x, row_off=y,
+                        width=min(self.patch_size, self.width - x),
+                        height=min(self.patch_size, self.height - y))
+        data = np.transpose(self.src.read(self.bands, window=window), (1, 2, 0))
+
+        if self.scale is not None:
+            data = data * self.scale
+            if self.stretch == "opencv":
+                # cv2 membulatkan (saturate_cast), bukan memotong
+                data = np.rint(data)
+            data = np.clip(data, 0, 255)
+
+        out[:data.shape[0], :data.shape[1]] = data
+        return out
+
+    def __iter__(self):
+        for y, x in self.positions():
+            yield (y, x), self.read_patch(y, x)
+
+    def batches(self, batch_size: int):
+        """Yield (positions, batch) pairs. The batch buffer is reused, consume it before the next step."""
+        positions = self.positions()
+        buffer = np.zeros((batch_size, self.patch_size, self.patch_size, len(self.bands)), dtype=self.dtype)
+
+        for start in range(0, len(positions), batch_size):
+            chunk = positions[start:start + batch_size]
+            for i, (y, x) in enumerate(chunk):
+                self.read_patch(y, x, out=buffer[i])
+            yield chunk, buffer[:len(chunk)]
@@ -0,0 +1,290 @@
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from affine import Affine
+from scipy.spatial import cKDTree
+from rasterio.features import shapes, sieve as gdal_sieve
+from rasterio.warp import transform as warp_transform
+from shapely.geometry import shape
+
+# Modul ini sengaja hanya bergantung pada library pihak ketiga agar bisa diimpor juga
+# oleh skrip mandiri (konvert_shp.py).
+
+# Proses spawn mengimpor ulang modul __main__; di dalam aplikasi itu berarti memuat UI dan
+# TensorFlow per worker, jadi jumlah worker default dibatasi dan mask kecil dikerjakan serial.
+MAX_WORKERS = 4
+PARALLEL_MIN_PIXELS = 64_000_000
+
+# jari-jari bumi authalic (luas bola = luas elipsoid WGS84)
+EARTH_RADIUS = 6371007.181
+
+def is_mercator(crs) -> bool:
+    return crs is not None and crs.to_dict().get("proj") == "merc"
+
+def pixel_areas(transform, crs, row_off: int, rows: int):
+    """
+    Ground area of one pixel for each row in [row_off, row_off + rows), in m2 for geographic
+    and Mercator (e.g. EPSG:3857) CRSs. For other projected CRSs it is the nominal pixel area
+    in CRS units, which is only a true ground area in equal-area or local projections (UTM).
+    """
+    if crs is not None and crs.is_geographic:
+        # luas sel lintang/bujur pada bola: R^2 * dlon * (sin(lat1) - sin(lat2))
+        edges = np.radians(transform.f + transform.e * np.arange(row_off, row_off + rows + 1))
+        return EARTH_RADIUS ** 2 * abs(np.radians(transform.a)) * np.abs(np.diff(np.sin(edges)))
+
+    area = abs(transform.a * transform.e - transform.b * transform.d)
+    if is_mercator(crs):
+        # Mercator memperbesar luas 1/cos^2(lat), dikoreksi dengan lintang tengah tiap baris
+        centers = transform.f + transform.e * (np.arange(row_off, row_off + rows) + 0.5)
+        _, lats = warp_transform(crs, "EPSG:4326", np.full(rows, transform.c), centers)
+        return area * np.cos(np.radians(lats)) ** 2
+    return np.full(rows, area)
+
+def sieve(class_array, transform, crs, min_area: float, connectivity: int = 4, nodata=None):
+    """
+    Remove connected regions smaller than min_area (m2, see pixel_areas) by
+    merging them into their largest neighbour, before any polygon is created. Pixels equal
+    to nodata are left untouched.
+    """
+    height = class_array.shape[0]
+    # luas piksel di tengah citra sebagai acuan untuk CRS geografis / Mercator
+    pixel_area = pixel_areas(transform, crs, height // 2, 1)[0]
+    size = int(np.ceil(min_area / pixel_area))
+    if size <= 1:
+        return class_array
+
+    # sieve GDAL butuh seluruh mask di memori
+    class_array = np.asarray(class_array)
+    mask = class_array != nodata if nodata is not None else None
+    return gdal_sieve(class_array, size, connectivity=connectivity, mask=mask)
+
+CLEANUP_METHODS = ("buffer", "make_valid", "simplify", "none")
+
+def clean_geometries(geometries, method: str = "buffer", tolerance: float = 1.0):
+    """
+    Vectorized geometry cleanup on a shapely geometry array (no per-polygon Python loop).
+
+    buffer     : buffer(tolerance).buffer(-tolerance), closes slivers and fixes self-intersections
+    make_valid : only repair invalid geometries
+    simplify   : topology-preserving simplify with `tolerance`
+    none       : leave the geometries as they are
+
+    Returns (geometries, keep), where keep drops geometries that became empty or have no area.
+    """
+    if method == "buffer":
+        geometries = shapely.buffer(shapely.buffer(geometries, tolerance), -tolerance)
+    elif method == "make_valid":
+        invalid = ~shapely.is_valid(geometries)
+        geometries = geometries.copy()
+        geometries[invalid] = shapely.make_valid(geometries[invalid])
+    elif method == "simplify":
+        geometries = shapely.simplify(geometries, tolerance, preserve_topology=True)
+    elif method != "none":
+        raise ValueError(f"Metode cleanup tidak dikenal: {method}")
+
+    keep = ~shapely.is_empty(geometries) & (shapely.area(geometries) > 0)
+    return geometries, keep
+
+def tile_windows(height: int, width: int, tile_size: int):
+    for row in range(0, height, tile_size):
+        for col in range(0, width, tile_size):
+            yield row, col, min(tile_size, height - row), min(tile_size, width - col)
+
+def _polygonize_tile(tile, row, col, height, width, nodata=None):
+    """
+    Polygonize one tile in pixel coordinates of the full mask. Returns (values, wkb, on_seam),
+    where on_seam marks polygons touching an inner tile edge that may continue in a neighbour.
+    """
+    mask = tile != nodata if nodata is not None else None
+    results = [(shape(geom), int(value)) for geom, value in shapes(tile, mask=mask, transform=Affine.translation(col, row))]
+    if not results:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=object), np.empty(0, dtype=bool)
+
+    geometries = np.empty(len(results), dtype=object)
+    geometries[:] = [geometry for geometry, _ in results]
+    values = np.array([value for _, value in results], dtype=np.int64)
+
+    rows, cols = tile.shape
+    minx, miny, maxx, maxy = shapely.bounds(geometries).T
+    on_seam = (
+        ((minx == col) & (col > 0)) |
+        ((maxx == col + cols) & (col + cols < width)) |
+        ((miny == row) & (row > 0)) |
+        ((maxy == row + rows) & (row + rows < height))
+    )
+    return values, shapely.to_wkb(geometries), on_seam
+
+def polygonize(
+        class_array,
+        transform,
+        crs,
+        labels: dict,
+        tile_size: int = 2048,
+        num_workers: int = None,
+        nodata=None,
+        cleanup: str = "none",
+        tolerance: float = 1.0
+    ):
+    """
+    Tiled, multi-process replacement for rasterio.features.shapes over a whole class mask.
+
+    Tiles are polygonized in pixel coordinates in a process pool. Polygons touching an inner
+    seam are dissolved per class and exploded back into single polygons, so features that
+    cross tiles come out whole. The result is georeferenced with `transform`, cleaned with
+    clean_geometries(cleanup, tolerance in map units) and has the columns class, label, geometry.
+
+    By default masks below PARALLEL_MIN_PIXELS are polygonized serially and larger ones use at
+    most MAX_WORKERS processes; pass num_workers to override.
+    """
+    height, width = class_array.shape
+    windows = list(tile_windows(height, width, tile_size))
+    if num_workers is None:
+        num_workers = 1 if height * width < PARALLEL_MIN_PIXELS else min(MAX_WORKERS, os.cpu_count() or 1)
+    num_workers = min(num_workers, len(windows))
+
+    tiles = (
+        (np.ascontiguousarray(class_array[row:row + rows, col:col + cols]), row, col, height, width, nodata)
+        for row, col, rows, cols in windows
+    )
+    if num_workers == 1:
+        parts = [_polygonize_tile(*args) for args in tiles]
+    else:
+        # spawn: proses induk bisa saja sudah memuat TensorFlow
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=mp.get_context("spawn")) as executor:
+            parts = [executor.submit(_polygonize_tile, *args) for args in tiles]
+            parts = [future.result() for future in parts]
+
+    values = np.concatenate([part[0] for part in parts])
+    geometries = shapely.from_wkb(np.concatenate([part[1] for part in parts]))
+    on_seam = np.concatenate([part[2] for part in parts])
+
+    inner = gpd.GeoDataFrame({"class": values[~on_seam]}, geometry=geometries[~on_seam])
+    seam = gpd.GeoDataFrame({"class": values[on_seam]}, geometry=geometries[on_seam])
+    if not seam.empty:
+        seam = seam.dissolve(by="class", as_index=False).explode(index_parts=False)
+
+    gdf = pd.concat([inner, seam], ignore_index=True)
+    # piksel -> koordinat peta
+    geometry = gdf.geometry.affine_transform([transform.a, transform.b, transform.d, transform.e, transform.c, transform.f])
+    geometry, keep = clean_geometries(geometry.to_numpy(), cleanup, tolerance)
+    values = gdf["class"].to_numpy()[keep]
+
+    return gpd.GeoDataFrame({
+        "class": values,
+        "label": [labels.get(value, "Unknown") for value in values],
+        "geometry": geometry[keep],
+    }, crs=crs)
+
+REASSIGN_METHODS = ("centroid", "boundary")
+
+def _nearest_centroid(geometries, small, large, workers):
+    centroids = shapely.centroid(geometries)
+    points = np.column_stack([shapely.get_x(centroids), shapely.get_y(centroids)])
+    _, nearest = cKDTree(points[large]).query(points[small], workers=workers)
+    return np.flatnonzero(large)[nearest]
+
+def _longest_shared_boundary(geometries, small, large, workers):
+    small_index, large_index = np.flatnonzero(small), np.flatnonzero(large)
+    tree = shapely.STRtree(geometries[large_index])
+    query_index, tree_index = tree.query(geometries[small_index], predicate="intersects")
+
+    shared = shapely.length(shapely.intersection(
+        shapely.boundary(geometries[small_index[query_index]]),
+        shapely.boundary(geometries[large_index[tree_index]]),
+    ))
+    touching = shared > 0
+    query_index, tree_index, shared = query_index[touching], tree_index[touching], shared[touching]
+
+    # per poligon kecil ambil tetangga dengan batas bersama terpanjang
+    order = np.lexsort((-shared, query_index))
+    first = order[np.unique(query_index[order], return_index=True)[1]]
+
+    target = np.full(len(small_index), -1, dtype=np.int64)
+    target[query_index[first]] = large_index[tree_index[first]]
+
+    # poligon kecil tanpa tetangga besar: kembali ke centroid terdekat
+    isolated = target < 0
+    if isolated.any():
+        isolated_mask = np.zeros(len(geometries), dtype=bool)
+        isolated_mask[small_index[isolated]] = True
+        target[isolated] = _nearest_centroid(geometries, isolated_mask, large, workers)
+    return target
+
+def reassign_small_polygons(gdf, min_area_threshold: float = 200, method: str = "centroid", workers: int = -1):
+    """
+    Give polygons smaller than min_area_threshold the class and label of a large polygon:
+    the one with the nearest centroid (cKDTree) or, with method="boundary", the adjacent one
+    sharing the longest boundary (STRtree). All lookups and assignments are done on arrays.
+    """
+    geometries = gdf.geometry.to_numpy()
+    area = shapely.area(geometries)
+    small, large = area < min_area_threshold, area >= min_area_threshold
+    if not small.any() or not large.any():
+        return gdf
+
+    if method == "centroid":
+        target = _nearest_centroid(geometries, small, large, workers)
+    elif method == "boundary":
+        target = _longest_shared_boundary(geometries, small, large, workers)
+    else:
+        raise ValueError(f"Metode reassign tidak dikenal: {method}")
+
+    for column in ("class", "label"):
+        values = gdf[column].to_numpy().copy()
+        values[small] = values[target]
+        gdf[column] = values
+    return gdf
+
+if __name__ == "__main__":
+    # python logic/classification/polygonize.py --size 2000
+    import argparse
+    import time
+
+    from rasterio.transform import from_origin
+
+    parser = argparse.ArgumentParser(description="Benchmark tiled polygonization and vectorized cleanup.")
+    parser.add_argument("--size", type=int, default=2000, help="Mask size; a 2x2 checkerboard gives (size / 2)^2 polygons.")
+    parser.add_argument("--tile-size", type=int, default=2048, help="Tile size for polygonization.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: serial below PARALLEL_MIN_PIXELS, else up to MAX_WORKERS).")
+    parser.add_argument("--cleanup", type=str, default="buffer", choices=CLEANUP_METHODS, help="Cleanup method to benchmark.")
+
+    args = parser.parse_args()
+
+    rows, cols = np.indices((args.size, args.size))
+    mask = (((rows // 2) + (cols // 2)) % 2 + 1).astype(np.uint8)
+    transform = from_origin(500000, 9950000, 1.0, 1.0)
+    labels = {1: "a", 2: "b"}
+
+    start = time.perf_counter()
+    single = [(shape(geom), value) for geom, value in shapes(mask, transform=transform)]
+    print(f"shapes() satu thread       : {time.perf_counter() - start:8.2f} s ({len(single)} poligon)")
+
+    start = time.perf_counter()
+    gdf = polygonize(mask, transform, None, labels, args.tile_size, args.workers)
+    print(f"polygonize() paralel       : {time.perf_counter() - start:8.2f} s ({len(gdf)} poligon)")
+
+    geometries = gdf.geometry.to_numpy()
+    if args.cleanup == "buffer":
+        loop = lambda geometry: geometry.buffer(1).buffer(-1)
+    elif args.cleanup == "make_valid":
+        loop = lambda geometry: geometry if geometry.is_valid else shapely.make_valid(geometry)
+    elif args.cleanup == "simplify":
+        loop = lambda geometry: geometry.simplify(1.0)
+    else:
+        loop = lambda geometry: geometry
+
+    start = time.perf_counter()
+    # filter sama dengan clean_geometries: ~is_empty & area > 0
+    looped = [geometry for geometry in map(loop, geometries) if not geometry.is_empty and geometry.area > 0]
+    loop_time = time.perf_counter() - start
+    print(f"cleanup per geometri ({args.cleanup}): {loop_time:8.2f} s")
+
+    start = time.perf_counter()
+    cleaned, keep = clean_geometries(geometries, args.cleanup)
+    vector_time = time.perf_counter() - start
+    print(f"cleanup vektor ({args.cleanup})      : {vector_time:8.2f} s (x{loop_time / max(vector_time, 1e-9):.1f})")
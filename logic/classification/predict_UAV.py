@@ -100,20 +100,17 @@ def extract_patches(image, patch_size=256, overlap=128):
 # 3️⃣ Prediksi Patch
 # ================================
 
-def predict_patched_image(model, image_path, patch_size=256, overlap=128):
+def predict_patched_image(model, image_path, patch_size=256, overlap=128, batch_size=32):
     image, original_size = load_image(image_path)
     patches, positions, padded_size = extract_patches(image, patch_size, overlap)
     
-    predictions = []
+    predictions = np.empty((len(patches), patch_size, patch_size), dtype=np.uint8)
 
-    for patch in patches:
-        patch_input = normalize_image(patch)
-        patch_input = np.expand_dims(patch_input, axis=0)
-        prediction = model.predict(patch_input)
-        predicted_mask = np.argmax(prediction, axis=-1)[0]
-        predictions.append(predicted_mask)
+    for start in range(0, len(patches), batch_size):
+        batch = normalize_image(patches[start:start + batch_size])
+        prediction = model.predict_on_batch(batch)
+        predictions[start:start + len(batch)] = np.argmax(prediction, axis=-1)
 
-    predictions = np.array(predictions)
     reconstructed_mask = reconstruct_from_patches(predictions, positions, padded_size, patch_size, overlap)
 
     return reconstructed_mask[:original_size[0], :original_size[1]]
@@ -175,12 +172,12 @@ def save_result(mask, output_path):
 # 7️⃣ Main Execution
 # ================================
 
-def main(image_path, model_path, output_path):
+def main(image_path, model_path, output_path, batch_size=32):
     print("Memuat model...")
     model = load_model(model_path, compile=False)
     
     print("Melakukan prediksi...")
-    mask = predict_patched_image(model, image_path)
+    mask = predict_patched_image(model, image_path, batch_size=batch_size)
     
     print("Menyimpan hasil segmentasi...")
     save_result(mask, output_path)
@@ -190,6 +187,7 @@ if __name__ == "__main__":
     parser.add_argument('--image', type=str, required=True, help="Path ke gambar input")
     parser.add_argument('--model', type=str, default="logic/classification/model/best_model_100e.h5", help="Path ke model terlatih")
     parser.add_argument('--output', type=str, default="output.png", help="Path untuk menyimpan hasil")
+    parser.add_argument('--batch-size', type=int, default=32, help="Jumlah patch per batch prediksi")
     args = parser.parse_args()
     
-    main(args.image, args.model, args.output)
+    main(args.image, args.model, args.output, args.batch_size)
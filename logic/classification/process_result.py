@@ -1,39 +1,60 @@
 import rasterio
 import numpy as np
+import pandas as pd
 import geopandas as gpd
-from rasterio.features import shapes
-from shapely.geometry import shape
-from scipy.spatial import cKDTree
+import pyogrio
 from PIL import Image
 
+from .polygonize import pixel_areas, polygonize, reassign_small_polygons, sieve
+from .palette import SATELLITE_PALETTE, preview_image
+from .raster_io import write_class_raster
 from utils.common import get_file_extension
 from utils.logger import setup_logger
 
+try:
+  import pyarrow
+except ImportError:
+  pyarrow = None
+
 logger = setup_logger()
 
-def save_vector(gdf: gpd.GeoDataFrame, output_path: str):
-  ext = get_file_extension(output_path)
-  if ext == "shp":
-    gdf.to_file(output_path)
-    logger.info(f"Shapefile berhasil disimpan : {output_path}")
-  elif ext == "geojson":
-    gdf.to_file(output_path, driver="GeoJSON")
-    logger.info(f"Geojson file berhasil disimpan : {output_path}")
-
-def save_geotiff(meta, class_array, output_path: str, nodata_value=255):
-  meta.update({"dtype": rasterio.uint8, "nodata": nodata_value, "count": 1})
-  with rasterio.open(output_path, "w", **meta) as dst:
-      dst.write(class_array, 1)
-  logger.info(f"GeoTIFF berhasil disimpan: {output_path}")
-
-decoded_classes = {
-  (167, 168, 167): 0, 
-  (21, 194, 59): 1,
-  (46, 15, 15): 2,
-  (237, 92, 14): 3,
-  (102, 237, 69): 4
+VECTOR_DRIVERS = {
+  "shp": "ESRI Shapefile",
+  "geojson": "GeoJSON",
+  "gpkg": "GPKG",
+  "fgb": "FlatGeobuf",
 }
 
+def save_vector(gdf: gpd.GeoDataFrame, output_path: str, chunk_size: int = 100_000, spatial_index: bool = True):
+  """
+  Write the polygons with pyogrio (Arrow bulk writer when pyarrow is available), chunk by
+  chunk. Shapefile, GeoJSON, GeoPackage and FlatGeobuf go through GDAL; GeoParquet is written
+  with one row group per chunk and a bbox covering column as its spatial index.
+  """
+  ext = get_file_extension(output_path)
+  if ext == "parquet":
+    gdf.to_parquet(output_path, row_group_size=chunk_size, write_covering_bbox=spatial_index)
+  elif ext in VECTOR_DRIVERS:
+    driver = VECTOR_DRIVERS[ext]
+    layer_options = {} if driver == "GeoJSON" else {"SPATIAL_INDEX": "YES" if spatial_index else "NO"}
+    options = {"use_arrow": pyarrow is not None}
+    if gdf.empty:
+      # kolom kosong bertipe null di Arrow dan tipe geometri tidak bisa ditebak dari data
+      options = {"use_arrow": False, "geometry_type": "Polygon"}
+    # FlatGeobuf dan GeoJSON tidak mendukung append, ditulis sekaligus
+    step = max(1, len(gdf) if driver in ("FlatGeobuf", "GeoJSON") else chunk_size)
+    for start in range(0, max(len(gdf), 1), step):
+      pyogrio.write_dataframe(
+        gdf.iloc[start:start + step], output_path, driver=driver, append=start > 0,
+        layer_options=layer_options, **options
+      )
+  else:
+    raise ValueError(f"Format file vektor tidak didukung: {ext}")
+  logger.info(f"File vektor berhasil disimpan : {output_path}")
+
+def save_geotiff(meta, class_array, output_path: str, nodata_value=255, profile: str = "cog", compress: str = "deflate"):
+  return write_class_raster(output_path, class_array, meta, nodata_value, SATELLITE_PALETTE.colors, profile, compress)
+
 class_labels = {
     0: 'ground',
     1: 'hutan',
@@ -42,16 +63,57 @@ class_labels = {
     4: 'vegetation'
 }
 
+def raster_area(class_array, transform, crs, labels: dict = class_labels, chunk_rows: int = 1024):
+  """
+  Total area per class straight from the class raster: pixel counts (np.bincount) times pixel
+  area, row block by row block. Returns a Series indexed by label, like the groupby on the gdf.
+
+  Geographic and Mercator rasters are corrected per row to m2 (see polygonize.pixel_areas);
+  for other CRSs the figures are only ground areas in equal-area or local projections (UTM).
+  """
+  height, width = class_array.shape
+  totals = np.zeros(256, dtype=np.float64)
+
+  for row in range(0, height, chunk_rows):
+    chunk = np.asarray(class_array[row:row + chunk_rows])
+    row_area = pixel_areas(transform, crs, row, chunk.shape[0])
+    if np.ptp(row_area) == 0:
+      totals += np.bincount(chunk.ravel(), minlength=256)[:256] * row_area[0]
+    else:
+      weights = np.repeat(row_area, width)
+      totals += np.bincount(chunk.ravel(), weights=weights, minlength=256)[:256]
+
+  present = np.flatnonzero(totals)
+  luas = pd.Series(totals[present], index=[labels.get(value, "Unknown") for value in present], name="luas")
+  return luas.groupby(level=0).sum().rename_axis("label")
+
 class ProcessResult:
-  def __init__(self, input_tif: str, input_png: str = "", image = None):
+  def __init__(self, input_tif: str = "", input_png: str = "", image = None, class_array: np.ndarray = None, meta: dict = None, cleanup: str = "buffer", reassign: str = "centroid", sieve_area: float = 0):
     self.input_tif = input_tif
     self.input_png = input_png
+    self.cleanup = cleanup  # lihat polygonize.CLEANUP_METHODS
+    self.reassign = reassign  # lihat polygonize.REASSIGN_METHODS
+    self.sieve_area = sieve_area  # luas minimum (satuan peta), 0 = tanpa sieve
   
   # def run(self):
-    self.meta, self.transform, self.crs = self.load_metadata(self.input_tif)
-    segmentasi_array = self.load_segmentation_image(self.input_png) if input_png else image
-    self.class_array = self.decode_segmentation(segmentasi_array)
-    self.gdf = self.get_gdf()
+    if meta is not None:
+      self.meta, self.transform, self.crs = meta.copy(), meta["transform"], meta["crs"]
+    else:
+      self.meta, self.transform, self.crs = self.load_metadata(self.input_tif)
+    if class_array is not None:
+      # ID kelas satelit langsung dari prediksi, tanpa decode warna
+      self.class_array = class_array
+    else:
+      segmentasi_array = self.load_segmentation_image(self.input_png) if input_png else image
+      self.class_array = self.decode_segmentation(segmentasi_array)
+    # poligon baru dibuat saat dibutuhkan (ekspor SHP)
+    self._gdf = None
+
+  @property
+  def gdf(self):
+    if self._gdf is None:
+      self._gdf = self.get_gdf()
+    return self._gdf
 
   def load_metadata(self, input_tif):
     with rasterio.open(input_tif) as src:
@@ -62,47 +124,32 @@ class ProcessResult:
     return np.array(image)
   
   def decode_segmentation(self, segmentasi_array):
-    height, width, _ = segmentasi_array.shape
-    class_array = np.zeros((height, width), dtype=np.uint8)
-    for color, class_id in decoded_classes.items():
-        mask = np.all(segmentasi_array == color, axis=-1)
-        class_array[mask] = class_id
-    return class_array
+    return SATELLITE_PALETTE.decode(segmentasi_array)
+
+  def preview(self, max_size: int = 2048):
+    """Downsampled colored image for the UI, see palette.preview_image."""
+    return preview_image(self.class_array, SATELLITE_PALETTE, max_size)
 
   def generate_polygons(self):
-    shapes_gen = shapes(self.class_array, transform=self.transform)
-    polygons, values, labels = [], [], []
-    for geom, value in shapes_gen:
-        poly = shape(geom).buffer(1).buffer(-1)  
-        polygons.append(poly)
-        values.append(value)
-        labels.append(class_labels.get(value, "Unknown"))
-    return polygons, values, labels
-
-  def create_geodataframe(self, polygons, values, labels):
-    return gpd.GeoDataFrame({"class": values, "label": labels, "geometry": polygons}, crs=self.crs)
-
-  def interpolate_small_polygons(self, gdf, min_area_threshold=200):
-    small_polygons = gdf[gdf.geometry.area < min_area_threshold]
-    large_polygons = gdf[gdf.geometry.area >= min_area_threshold]
-    if not small_polygons.empty and not large_polygons.empty:
-        small_centroids = np.array([geom.centroid.coords[0] for geom in small_polygons.geometry])
-        large_centroids = np.array([geom.centroid.coords[0] for geom in large_polygons.geometry])
-        tree = cKDTree(large_centroids)
-        _, indices = tree.query(small_centroids)
-        for small_idx, large_idx in zip(small_polygons.index, indices):
-            gdf.at[small_idx, "class"] = large_polygons.iloc[large_idx]["class"]
-            gdf.at[small_idx, "label"] = large_polygons.iloc[large_idx]["label"]
-    return gdf
+    class_array = self.class_array
+    if self.sieve_area:
+      # buang speckle di domain raster sebelum shapes()
+      class_array = sieve(class_array, self.transform, self.crs, self.sieve_area)
+    return polygonize(class_array, self.transform, self.crs, class_labels, cleanup=self.cleanup)
+
+  def interpolate_small_polygons(self, gdf, min_area_threshold=200, method="centroid"):
+    return reassign_small_polygons(gdf, min_area_threshold, method)
 
   def get_gdf(self):
-    polygons, values, labels = self.generate_polygons()
-    gdf = self.create_geodataframe(polygons, values, labels)
-    gdf = self.interpolate_small_polygons(gdf)
+    gdf = self.generate_polygons()
+    gdf = self.interpolate_small_polygons(gdf, method=self.reassign)
 
     return gdf
 
   def calculate_area(self):
+    return raster_area(self.class_array, self.transform, self.crs)
+
+  def calculate_polygon_area(self):
     self.gdf["luas"] = self.gdf.geometry.area  
     
     luas_total = self.gdf.groupby("label")["luas"].sum()
@@ -117,11 +164,8 @@ class ProcessResult:
     self.gdf.to_file(output_path)
     logger.info(f"Shapefile berhasil disimpan: {output_path}")
 
-  def save_geotiff(self, output_path: str, nodata_value=255):
-    self.meta.update({"dtype": rasterio.uint8, "nodata": nodata_value, "count": 1})
-    with rasterio.open(output_path, "w", **self.meta) as dst:
-        dst.write(self.class_array, 1)
-    logger.info(f"GeoTIFF berhasil disimpan: {output_path}")
+  def save_geotiff(self, output_path: str, nodata_value=255, profile: str = "cog", compress: str = "deflate"):
+    return save_geotiff(self.meta, self.class_array, output_path, nodata_value, profile, compress)
 
 if __name__ == "__main__":
    process = ProcessResult(
@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+import rasterio
+import rasterio.shutil
+from rasterio.enums import Resampling
+from rasterio.windows import Window
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+RASTER_PROFILES = ("cog", "gtiff")
+
+def overview_factors(height: int, width: int, block_size: int = 512):
+    """2, 4, 8, ... until the smallest overview fits in a single block."""
+    factors, factor = [], 2
+    while max(height, width) / factor >= block_size:
+        factors.append(factor)
+        factor *= 2
+    return factors or [2]
+
+def write_windows(dst, class_array, block_size: int):
+    """Write class_array (array or memmap) strip by strip so it is never copied as a whole."""
+    height, width = class_array.shape
+    for row in range(0, height, block_size):
+        rows = min(block_size, height - row)
+        dst.write(np.asarray(class_array[row:row + rows], dtype=np.uint8), 1, window=Window(0, row, width, rows))
+
+class ClassRaster:
+    """
+    Read-only, array-like view of a single-band class GeoTIFF. Slicing reads only the
+    requested window, so the chunked consumers (raster_area, preview_image, write_windows,
+    polygonize) work on masks that never fit in memory as a whole. Strided slices use a
+    decimated nearest-neighbour read.
+    """
+
+    ndim = 2
+    dtype = np.dtype(np.uint8)
+
+    def __init__(self, path: str):
+        self.path = path
+        with rasterio.open(path) as src:
+            self.shape = (src.height, src.width)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        if not all(isinstance(k, slice) for k in key):
+            raise TypeError("ClassRaster hanya mendukung indeks slice")
+
+        (row_start, row_stop, row_step), (col_start, col_stop, col_step) = (
+            k.indices(size) for k, size in zip(key, self.shape))
+        window = Window(col_start, row_start, max(0, col_stop - col_start), max(0, row_stop - row_start))
+        out_shape = (len(range(row_start, row_stop, row_step)), len(range(col_start, col_stop, col_step)))
+
+        with rasterio.open(self.path) as src:
+            if row_step == 1 and col_step == 1:
+                return src.read(1, window=window)
+            return src.read(1, window=window, out_shape=out_shape, resampling=Resampling.nearest)
+
+    def __array__(self, dtype=None):
+        with rasterio.open(self.path) as src:
+            data = src.read(1)
+        return data if dtype is None else data.astype(dtype)
+
+    def map_blocks(self, func):
+        """Replace every block in place with func(block), one internal block at a time."""
+        with rasterio.open(self.path, "r+") as dst:
+            for _, window in dst.block_windows(1):
+                dst.write(func(dst.read(1, window=window)), 1, window=window)
+
+def write_class_raster(
+        output_path: str,
+        class_array,
+        meta: dict,
+        nodata=255,
+        colors: dict = None,
+        profile: str = "cog",
+        compress: str = "deflate",
+        block_size: int = 512
+    ):
+    """
+    Write a single-band uint8 class raster.
+
+    profile="cog"  : internally tiled, compressed Cloud-Optimized GeoTIFF with mode-resampled
+                     overviews and a color table. Written window by window into a temporary
+                     tiled GeoTIFF, then laid out as COG by the GDAL COG driver.
+    profile="gtiff": the same tiled, compressed GeoTIFF without overviews and COG layout.
+    """
+    if profile not in RASTER_PROFILES:
+        raise ValueError(f"Profil raster tidak didukung: {profile}")
+
+    height, width = class_array.shape
+    options = {
+        "driver": "GTiff",
+        "width": width,
+        "height": height,
+        "count": 1,
+        "dtype": rasterio.uint8,
+        "crs": meta.get("crs"),
+        "transform": meta.get("transform"),
+        "nodata": nodata,
+        "tiled": True,
+        "blockxsize": block_size,
+        "blockysize": block_size,
+        "compress": compress,
+        "BIGTIFF": "IF_SAFER",
+    }
+    target = f"{output_path}.tmp.tif" if profile == "cog" else output_path
+
+    with rasterio.open(target, "w", **options) as dst:
+        write_windows(dst, class_array, block_size)
+        if colors:
+            dst.write_colormap(1, {class_id: (*color, 255) for class_id, color in colors.items()})
+        if profile == "cog":
+            # mode: kelas dominan, bukan rata-rata ID kelas
+            dst.build_overviews(overview_factors(height, width, block_size), Resampling.mode)
+            dst.update_tags(ns="rio_overview", resampling="mode")
+
+    if profile == "cog":
+        try:
+            rasterio.shutil.copy(
+                target, output_path, driver="COG",
+                compress=compress, blocksize=block_size, overviews="FORCE_USE_EXISTING", bigtiff="IF_SAFER"
+            )
+        finally:
+            os.remove(target)
+
+    logger.info(f"GeoTIFF berhasil disimpan: {output_path}")
+    return output_path
@@ -0,0 +1,182 @@
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# ================================
+# Tujuan penulisan mask (sink)
+# ================================
+
+class ArraySink:
+    """Keeps the reconstructed mask in memory."""
+
+    def __init__(self, height: int, width: int):
+        self.array = np.zeros((height, width), dtype=np.uint8)
+
+    def write(self, row_off, rows):
+        self.array[row_off:row_off + rows.shape[0]] = rows
+
+    def close(self):
+        return self.array
+
+class MemmapSink(ArraySink):
+    """Writes the reconstructed mask into a memory-mapped file."""
+
+    def __init__(self, path: str, height: int, width: int):
+        self.path = path
+        self.array = np.memmap(path, dtype=np.uint8, mode="w+", shape=(height, width))
+
+    def close(self):
+        self.array.flush()
+        return self.array
+
+class GeoTiffSink:
+    """Writes the reconstructed mask into a single band GeoTIFF, strip by strip."""
+
+    def __init__(self, path: str, profile: dict, block_size: int = 512, nodata=None):
+        self.path = path
+        # georeferensi dari profile citra input, sisanya khusus mask
+        profile = {key: profile[key] for key in ("width", "height", "crs", "transform") if key in profile}
+        profile.update(
+            driver="GTiff", dtype=rasterio.uint8, count=1, tiled=True,
+            blockxsize=block_size, blockysize=block_size, compress="deflate", BIGTIFF="IF_SAFER", nodata=nodata
+        )
+        self.dst = rasterio.open(path, "w", **profile)
+
+    def write(self, row_off, rows):
+        window = Window(col_off=0, row_off=row_off, width=rows.shape[1], height=rows.shape[0])
+        self.dst.write(rows, 1, window=window)
+
+    def close(self):
+        self.dst.close()
+        logger.info(f"Mask disimpan: {self.path}")
+        return self.path
+
+# ================================
+# Rekonstruksi per strip
+# ================================
+
+def patch_alpha(y, x, h_patch, w_patch, overlap):
+    alpha = np.ones((h_patch, w_patch), dtype=np.float32)
+    if x > 0:
+        alpha[:, :min(overlap, w_patch)] *= np.linspace(0.2, 1, min(overlap, w_patch))[None, :]
+    if y > 0:
+        alpha[:min(overlap, h_patch), :] *= np.linspace(0.2, 1, min(overlap, h_patch))[:, None]
+    return alpha
+
+def blend_window(patch_size: int, kind: str = "hann", floor: float = 1e-2):
+    """2D weight window for probability blending, computed once per reconstruction."""
+    if kind == "hann":
+        window_1d = np.hanning(patch_size)
+    elif kind == "gaussian":
+        sigma = patch_size / 8
+        center = (patch_size - 1) / 2
+        window_1d = np.exp(-((np.arange(patch_size) - center) ** 2) / (2 * sigma ** 2))
+    elif kind == "flat":
+        window_1d = np.ones(patch_size)
+    else:
+        raise ValueError(f"Unsupported blend window: {kind}")
+
+    # batas bawah agar piksel tepi citra (hanya tercakup satu patch) tetap punya bobot
+    window = np.outer(window_1d, window_1d)
+    return np.maximum(window / window.max(), floor).astype(np.float16)
+
+class StripReconstructor:
+    """
+    Blends overlapping patch masks while keeping only one patch-high strip in memory.
+
+    Patches must arrive in row-major order (as produced by WindowedPatchReader). Rows above
+    the current patch row can no longer change, so they are finalized and written to the sink.
+    """
+
+    def __init__(self, height: int, width: int, num_classes: int, sink, patch_size: int = 256, overlap: int = 128):
+        self.height = height
+        self.width = width
+        self.num_classes = num_classes
+        self.sink = sink
+        self.patch_size = patch_size
+        self.overlap = overlap
+        self.row_off = 0
+
+        self.allocate_buffers()
+
+    def allocate_buffers(self):
+        self.values = np.zeros((self.patch_size, self.width), dtype=np.float32)
+        self.weight = np.zeros((self.patch_size, self.width), dtype=np.float32)
+
+    def buffers(self):
+        return [self.values, self.weight]
+
+    def advance(self, y):
+        if y < self.row_off:
+            raise ValueError("Patch harus diproses berurutan baris demi baris")
+        if y > self.row_off:
+            self.flush(y - self.row_off)
+
+    def add(self, y, x, patch):
+        self.advance(y)
+
+        h_patch = min(patch.shape[0], self.height - y)
+        w_patch = min(patch.shape[1], self.width - x)
+
+        alpha = patch_alpha(y, x, h_patch, w_patch, self.overlap)
+        self.values[:h_patch, x:x + w_patch] += patch[:h_patch, :w_patch] * alpha
+        self.weight[:h_patch, x:x + w_patch] += alpha
+
+    def finalize(self, rows):
+        strip = self.values[:rows] / np.maximum(self.weight[:rows], 1)
+        return np.clip(strip, 0, self.num_classes - 1).astype(np.uint8)
+
+    def flush(self, rows):
+        rows = min(rows, self.height - self.row_off)
+        if rows <= 0:
+            return
+
+        self.sink.write(self.row_off, self.finalize(rows))
+
+        # geser buffer ke atas
+        for buffer in self.buffers():
+            buffer[:-rows] = buffer[rows:]
+            buffer[-rows:] = 0
+        self.row_off += rows
+
+    def close(self):
+        self.flush(self.patch_size)
+        return self.sink.close()
+
+class ProbabilityStripReconstructor(StripReconstructor):
+    """
+    Blends per-class probabilities of overlapping patches with a fixed 2D window
+    and takes the argmax once a strip is final. Accumulator is stored as float16.
+    """
+
+    def __init__(self, height: int, width: int, num_classes: int, sink, patch_size: int = 256, overlap: int = 128, window: str = "hann"):
+        super().__init__(height, width, num_classes, sink, patch_size, overlap)
+        self.window = blend_window(patch_size, window)[:, :, None]
+
+    def allocate_buffers(self):
+        self.values = np.zeros((self.patch_size, self.width, self.num_classes), dtype=np.float16)
+
+    def buffers(self):
+        return [self.values]
+
+    def add(self, y, x, probabilities):
+        self.advance(y)
+
+        h_patch = min(probabilities.shape[0], self.height - y)
+        w_patch = min(probabilities.shape[1], self.width - x)
+
+        self.values[:h_patch, x:x + w_patch] += probabilities[:h_patch, :w_patch] * self.window[:h_patch, :w_patch]
+
+    def finalize(self, rows):
+        # bobot window sama untuk semua kelas, jadi tidak perlu dinormalisasi sebelum argmax
+        return np.argmax(self.values[:rows], axis=-1).astype(np.uint8)
+
+def reconstruct(predictions, reconstructor: StripReconstructor):
+    """Feed ((y, x), mask or probabilities) pairs into the reconstructor and return the sink result."""
+    for (y, x), patch in predictions:
+        reconstructor.add(y, x, patch)
+    return reconstructor.close()
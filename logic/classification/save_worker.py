@@ -1,14 +1,13 @@
 from PyQt6.QtCore import pyqtSignal, QThread
-import rasterio
 
-from utils.common import get_file_extension
+from .process_result import ProcessResult, save_geotiff, save_vector
 from utils.logger import setup_logger
 
 logger = setup_logger()
 class SaveWorker(QThread):
     error = pyqtSignal(str)
 
-    def __init__(self, mode, output_path, gdf=None, meta=None, class_array=None, nodata_value=255):
+    def __init__(self, mode, output_path, gdf=None, meta=None, class_array=None, nodata_value=255, sieve_area=0, raster_profile="cog"):
         super().__init__()
         self.mode = mode  # "vector" or "raster"
         self.output_path = output_path
@@ -16,6 +15,8 @@ class SaveWorker(QThread):
         self.meta = meta
         self.class_array = class_array
         self.nodata_value = nodata_value
+        self.raster_profile = raster_profile  # "cog" atau "gtiff"
+        self.sieve_area = sieve_area  # luas minimum region (satuan peta) sebelum poligonisasi
 
     def run(self):
         try:
@@ -30,21 +31,11 @@ class SaveWorker(QThread):
             logger.critical(f"Error in save worker: {e}")
 
     def save_vector(self):
-        ext = get_file_extension(self.output_path)
-        if ext == "shp":
-            self.gdf.to_file(self.output_path)
-        elif ext == "geojson":
-            self.gdf.to_file(self.output_path, driver="GeoJSON")
-        else:
-            raise ValueError("Unsupported vector file format")
-        logger.info(f"Vector file saved: {self.output_path}")
+        if self.gdf is None:
+            logger.info("Membuat poligon dari hasil klasifikasi...")
+            self.gdf = ProcessResult(meta=self.meta, class_array=self.class_array, sieve_area=self.sieve_area).gdf
+
+        save_vector(self.gdf, self.output_path)
 
     def save_geotiff(self):
-        self.meta.update({
-            "dtype": rasterio.uint8,
-            "nodata": self.nodata_value,
-            "count": 1
-        })
-        with rasterio.open(self.output_path, "w", **self.meta) as dst:
-            dst.write(self.class_array, 1)
-        logger.info(f"GeoTIFF saved: {self.output_path}")
\ No newline at end of file
+        save_geotiff(self.meta, self.class_array, self.output_path, self.nodata_value, self.raster_profile)
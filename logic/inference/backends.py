@@ -0,0 +1,82 @@
+import numpy as np
+import tensorflow as tf
+
+from utils.logger import setup_logger
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+logger = setup_logger()
+
+BACKENDS = ("keras", "onnx", "tflite")
+
+def finalize_output(probabilities, output):
+    """Same output contract as InferenceEngine: uint8 class map or float16 probabilities."""
+    if output == "argmax":
+        return np.argmax(probabilities, axis=-1).astype(np.uint8)
+    return probabilities.astype(np.float16)
+
+class OnnxBackend:
+    """Runs an exported .onnx model with onnxruntime on CPU."""
+
+    def __init__(self, model_path: str, output: str = "probabilities", num_threads: int = 0):
+        if ort is None:
+            raise ImportError("onnxruntime belum terpasang, jalankan: pip install onnxruntime")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.output = output
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.input_shape = tuple(self.session.get_inputs()[0].shape[1:])
+
+    def predict(self, batch):
+        probabilities = self.session.run(None, {self.input_name: np.asarray(batch, dtype=np.float32)})[0]
+        return finalize_output(probabilities, self.output)
+
+    def warm_up(self, batch_size: int = 1):
+        self.predict(np.zeros((batch_size, *self.input_shape), dtype=np.float32))
+
+class TFLiteBackend:
+    """Runs an exported .tflite model with the TFLite interpreter."""
+
+    def __init__(self, model_path: str, output: str = "probabilities", num_threads: int = 0):
+        self.output = output
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads or None)
+        self.interpreter.allocate_tensors()
+
+        self.input_detail = self.interpreter.get_input_details()[0]
+        self.output_detail = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(self.input_detail["shape"][1:])
+        self.batch_size = self.input_detail["shape"][0]
+
+    def resize(self, batch_size):
+        if batch_size != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input_detail["index"], [batch_size, *self.input_shape])
+            self.interpreter.allocate_tensors()
+            self.batch_size = batch_size
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        self.resize(len(batch))
+
+        # model full-integer: kuantisasi input dan dekuantisasi output sesuai parameter tensor
+        if self.input_detail["dtype"] != np.float32:
+            scale, zero_point = self.input_detail["quantization"]
+            batch = np.round(batch / scale + zero_point).astype(self.input_detail["dtype"])
+
+        self.interpreter.set_tensor(self.input_detail["index"], batch)
+        self.interpreter.invoke()
+        probabilities = self.interpreter.get_tensor(self.output_detail["index"])
+
+        if self.output_detail["dtype"] != np.float32:
+            scale, zero_point = self.output_detail["quantization"]
+            probabilities = (probabilities.astype(np.float32) - zero_point) * scale
+        return finalize_output(probabilities, self.output)
+
+    def warm_up(self, batch_size: int = 1):
+        self.predict(np.zeros((batch_size, *self.input_shape), dtype=np.float32))
@@ -0,0 +1,40 @@
+import numpy as np
+import tensorflow as tf
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+class InferenceEngine:
+    """
+    Forward pass compiled once as a tf.function with a fixed (None, H, W, C) input signature.
+
+    output="argmax" returns the class map (uint8) and output="probabilities" returns the
+    softmax (float16), both computed inside the graph so only the result leaves TensorFlow.
+    """
+
+    OUTPUTS = ("argmax", "probabilities")
+
+    def __init__(self, model, tile_size: int = 256, channels: int = None, output: str = "probabilities", jit_compile: bool = False):
+        if output not in self.OUTPUTS:
+            raise ValueError(f"Unsupported engine output: {output}")
+
+        _, height, width, model_channels = model.input_shape
+        self.model = model
+        self.output = output
+        self.input_shape = (height or tile_size, width or tile_size, channels or model_channels)
+
+        signature = [tf.TensorSpec(shape=(None, *self.input_shape), dtype=tf.float32)]
+        self._forward = tf.function(self._call, input_signature=signature, jit_compile=jit_compile)
+
+    def _call(self, x):
+        probabilities = self.model(x, training=False)
+        if self.output == "argmax":
+            return tf.cast(tf.argmax(probabilities, axis=-1), tf.uint8)
+        return tf.cast(probabilities, tf.float16)
+
+    def predict(self, batch):
+        return self._forward(np.asarray(batch, dtype=np.float32)).numpy()
+
+    def warm_up(self, batch_size: int = 1):
+        self.predict(np.zeros((batch_size, *self.input_shape), dtype=np.float32))
@@ -0,0 +1,89 @@
+import argparse
+import sys
+import numpy as np
+import tensorflow as tf
+
+from logic.classification.patch_reader import WindowedPatchReader
+from logic.inference.model_registry import MODELS, model_registry
+from utils.logger import setup_logger
+
+try:
+    import tf2onnx
+except ImportError:
+    tf2onnx = None
+
+logger = setup_logger()
+
+def _input_signature(model, tile_size=256):
+    _, height, width, channels = model.input_shape
+    return [tf.TensorSpec(shape=(None, height or tile_size, width or tile_size, channels), dtype=tf.float32, name="input")]
+
+def convert_onnx(model, output_path: str, opset: int = 13) -> str:
+    if tf2onnx is None:
+        raise ImportError("tf2onnx belum terpasang, jalankan: pip install tf2onnx")
+
+    tf2onnx.convert.from_keras(model, input_signature=_input_signature(model), opset=opset, output_path=output_path)
+    logger.info(f"Model ONNX disimpan: {output_path}")
+    return output_path
+
+def convert_tflite(model, output_path: str) -> str:
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    # SELECT_TF_OPS untuk layer yang belum punya kernel TFLite (mis. reshape dinamis di SwinTransformerBlock)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+    logger.info(f"Model TFLite disimpan: {output_path}")
+    return output_path
+
+def export_onnx(name: str, opset: int = 13) -> str:
+    return convert_onnx(model_registry.get(name).model, model_registry.resolve_path(name, "onnx"), opset)
+
+def export_tflite(name: str) -> str:
+    return convert_tflite(model_registry.get(name).model, model_registry.resolve_path(name, "tflite"))
+
+def sample_tiles(name: str, image_path: str, count: int = 16, tile_size: int = 256):
+    """Read `count` evenly spaced tiles with the same preprocessing the app uses for this model."""
+    spec = MODELS[name]
+    with WindowedPatchReader(image_path, bands=spec["bands"], patch_size=tile_size, overlap=0, stretch=spec["stretch"]) as reader:
+        positions = reader.positions()
+        step = max(1, len(positions) // count)
+        tiles = np.stack([reader.read_patch(y, x) for y, x in positions[::step][:count]]).astype(np.float32)
+
+    if spec["stretch"]:
+        tiles /= 255.0
+    return tiles
+
+def check_parity(name: str, backend: str, tiles, min_agreement: float = 0.99):
+    """Compare the class maps of an exported backend against Keras. Returns (passed, agreement)."""
+    reference = model_registry.get(name).predict(tiles, output="argmax")
+    candidate = model_registry.get(name, backend).predict(tiles, output="argmax")
+
+    agreement = float(np.mean(reference == candidate))
+    logger.info(f"Kesesuaian piksel {name} keras vs {backend}: {agreement:.4%}")
+    return agreement >= min_agreement, agreement
+
+if __name__ == "__main__":
+    # python -m logic.inference.export --model sentinel --format onnx tflite --sample-image data/scene.tif
+    parser = argparse.ArgumentParser(description="Export classification models to ONNX / TFLite and check parity with Keras.")
+    parser.add_argument("--model", type=str, required=True, choices=list(MODELS), help="Model to export.")
+    parser.add_argument("--format", type=str, nargs="+", default=["onnx"], choices=["onnx", "tflite"], help="Export format(s).")
+    parser.add_argument("--opset", type=int, default=13, help="ONNX opset version.")
+    parser.add_argument("--sample-image", type=str, help="Raster used to check parity with Keras after export.")
+    parser.add_argument("--num-tiles", type=int, default=16, help="Number of sample tiles for the parity check.")
+    parser.add_argument("--min-agreement", type=float, default=0.99, help="Minimum pixel agreement to pass the parity check.")
+
+    args = parser.parse_args()
+
+    for export_format in args.format:
+        if export_format == "onnx":
+            export_onnx(args.model, args.opset)
+        else:
+            export_tflite(args.model)
+
+    if args.sample_image:
+        tiles = sample_tiles(args.model, args.sample_image, args.num_tiles)
+        results = [check_parity(args.model, export_format, tiles, args.min_agreement)[0] for export_format in args.format]
+        if not all(results):
+            logger.critical("Hasil model ekspor berbeda dari Keras melebihi batas toleransi")
+            sys.exit(1)
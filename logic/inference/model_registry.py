@@ -0,0 +1,196 @@
+from PyQt6.QtCore import QThread, QObject, pyqtSignal
+from collections import OrderedDict
+from typing import Optional
+
+import gc
+import os
+import threading
+from keras.models import load_model
+from keras.utils import custom_object_scope
+
+from logic.inference.backends import BACKENDS, OnnxBackend, TFLiteBackend
+from logic.inference.engine import InferenceEngine
+from logic.sentinel_classification.unet import SwinTransformerBlock
+from logic.sentinel_classification.train_model import _masked_sparse_categorical_crossentropy
+
+from utils.common import resource_path
+from utils.logger import setup_logger
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = setup_logger()
+
+# ================================
+# Daftar model yang dipakai aplikasi
+# ================================
+
+# bands/stretch: cara membaca input tiap model (lihat WindowedPatchReader)
+
+MODELS = {
+    "satellite": {
+        "path": os.path.join("logic", "classification", "model", "best_model_fix.h5"),
+        "custom_objects": None,
+        "bands": (3, 2, 1),
+        "stretch": "opencv",
+    },
+    "uav": {
+        "path": os.path.join("logic", "classification", "model", "best_model_100e.h5"),
+        "custom_objects": None,
+        "bands": (1, 2, 3),
+        "stretch": True,
+    },
+    "sentinel": {
+        "path": os.path.join("logic", "sentinel_classification", "model", "unet_model_2025-04-09_12-12-51.keras"),
+        "custom_objects": {
+            "SwinTransformerBlock": SwinTransformerBlock,
+            "_masked_sparse_categorical_crossentropy": _masked_sparse_categorical_crossentropy,
+        },
+        "bands": tuple(range(1, 11)),
+        "stretch": False,
+    },
+}
+
+# varian hasil logic/inference/quantize.py
+PRECISIONS = ("float32", "float16", "int8")
+
+class ModelEntry:
+    """A loaded model together with its compiled inference engines."""
+
+    def __init__(self, name: str, backend: str, path: str, mtime: float, model=None, jit_compile: bool = False, num_threads: int = 0, lock=None):
+        self.name = name
+        self.backend = backend
+        self.path = path
+        self.mtime = mtime
+        self.model = model
+        self.jit_compile = jit_compile
+        self.num_threads = num_threads
+        # lock registry, agar warm-up dan thread klasifikasi tidak membuat engine ganda
+        self._lock = lock or threading.RLock()
+        self._engines = {}
+
+    def engine(self, output: str = "probabilities"):
+        with self._lock:
+            if output not in self._engines:
+                if self.backend == "onnx":
+                    engine = OnnxBackend(self.path, output=output, num_threads=self.num_threads)
+                elif self.backend == "tflite":
+                    engine = TFLiteBackend(self.path, output=output, num_threads=self.num_threads)
+                else:
+                    engine = InferenceEngine(self.model, output=output, jit_compile=self.jit_compile)
+                self._engines[output] = engine
+            return self._engines[output]
+
+    def predict(self, batch, output: str = "probabilities"):
+        return self.engine(output).predict(batch)
+
+    def warm_up(self, output: str = "probabilities"):
+        self.engine(output).warm_up()
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models, keyed by file path and modification time.
+
+    Models are loaded lazily on first use and evicted least-recently-used first when
+    more than max_models are cached or available memory drops below min_free_memory.
+    """
+
+    def __init__(self, max_models: int = 2, min_free_memory: int = 2 * 1024 ** 3, jit_compile: bool = False, num_threads: int = 0):
+        self.max_models = max_models
+        self.min_free_memory = min_free_memory
+        # kompilasi XLA untuk CPU, aktifkan bila versi TensorFlow mendukung model yang dipakai
+        self.jit_compile = jit_compile
+        # jumlah thread untuk backend onnx/tflite, 0 = default library
+        self.num_threads = num_threads
+
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def resolve_path(self, name: str, backend: str = "keras", precision: str = "float32") -> str:
+        if name not in MODELS:
+            raise ValueError(f"Model tidak dikenal: {name}")
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend tidak dikenal: {backend}")
+        if precision not in PRECISIONS:
+            raise ValueError(f"Presisi tidak dikenal: {precision}")
+        if precision != "float32" and backend != "tflite":
+            raise ValueError("Model terkuantisasi hanya tersedia untuk backend tflite")
+
+        path = resource_path(MODELS[name]["path"])
+        if backend == "keras":
+            return path
+
+        base = os.path.splitext(path)[0]
+        if precision != "float32":
+            base = f"{base}.{precision}"
+        return f"{base}.{backend}"
+
+    def get(self, name: str, backend: str = "keras", precision: str = "float32") -> ModelEntry:
+        path = self.resolve_path(name, backend, precision)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"File model tidak ditemukan: {path}")
+        key = (path, os.path.getmtime(path))
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+            # file model berubah di disk, buang versi lama
+            for stale_key in [k for k in self._entries if k[0] == path]:
+                del self._entries[stale_key]
+
+            self.evict(reserve=1)
+            logger.info(f"Memuat model {name} ({backend}): {path}")
+            model = self._load(name, path) if backend == "keras" else None
+            entry = ModelEntry(name, backend, path, key[1], model, self.jit_compile, self.num_threads, self._lock)
+            self._entries[key] = entry
+            return entry
+
+    def _load(self, name: str, path: str):
+        custom_objects = MODELS[name]["custom_objects"]
+        if custom_objects is None:
+            return load_model(path, compile=False)
+        with custom_object_scope(custom_objects):
+            return load_model(path)
+
+    def memory_is_tight(self) -> bool:
+        if psutil is None:
+            return False
+        return psutil.virtual_memory().available < self.min_free_memory
+
+    def evict(self, reserve: int = 0):
+        """Drop least recently used models until there is room for `reserve` more."""
+        with self._lock:
+            while self._entries and (len(self._entries) + reserve > self.max_models or self.memory_is_tight()):
+                _, entry = self._entries.popitem(last=False)
+                logger.info(f"Melepas model dari cache: {entry.name}")
+            gc.collect()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            gc.collect()
+
+    def warm_up(self, names):
+        for name in names:
+            self.get(name).warm_up()
+
+model_registry = ModelRegistry()
+
+class ModelWarmupWorker(QThread):
+    """Loads and traces models in the background, e.g. while the splash screen is shown."""
+    error = pyqtSignal(str)
+
+    def __init__(self, names=("satellite",), parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.names = list(names)
+
+    def run(self):
+        try:
+            model_registry.warm_up(self.names)
+        except Exception as e:
+            self.error.emit(str(e))
+            logger.warning(f"Warm-up model gagal: {e}")
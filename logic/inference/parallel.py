@@ -0,0 +1,126 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import multiprocessing as mp
+import os
+import numpy as np
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# state milik tiap worker process (diisi oleh _init_worker)
+_worker = {}
+
+def _attach(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _init_worker(model_name, backend, precision, output, num_threads, inputs_spec, outputs_spec):
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    from logic.inference.model_registry import model_registry
+    model_registry.num_threads = num_threads
+
+    input_shm, inputs = _attach(*inputs_spec)
+    output_shm, outputs = _attach(*outputs_spec)
+    _worker.update(
+        engine=model_registry.get(model_name, backend, precision).engine(output),
+        shm=(input_shm, output_shm),
+        inputs=inputs,
+        outputs=outputs,
+    )
+
+def _predict_slot(slot, count):
+    _worker["outputs"][slot, :count] = _worker["engine"].predict(_worker["inputs"][slot, :count])
+    return slot
+
+class ParallelPredictor:
+    """
+    Runs batched inference in a pool of worker processes, each with its own model instance
+    and thread budget. Batches are written into shared-memory slots and results are read back
+    from shared memory, so only slot indices cross the process boundary.
+
+    Results are yielded in submission order, which keeps the row-major order the strip
+    reconstruction relies on.
+    """
+
+    def __init__(
+            self,
+            model_name: str,
+            input_shape,
+            num_classes: int,
+            batch_size: int = 16,
+            output: str = "probabilities",
+            backend: str = "keras",
+            precision: str = "float32",
+            num_workers: int = None,
+            threads_per_worker: int = None
+        ):
+        self.num_workers = num_workers or max(1, (os.cpu_count() or 2) // 4)
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.num_workers)
+        self.batch_size = batch_size
+        self.num_slots = 2 * self.num_workers
+
+        tile_height, tile_width = input_shape[:2]
+        inputs_shape = (self.num_slots, batch_size, *input_shape)
+        if output == "argmax":
+            outputs_shape, outputs_dtype = (self.num_slots, batch_size, tile_height, tile_width), np.uint8
+        else:
+            outputs_shape, outputs_dtype = (self.num_slots, batch_size, tile_height, tile_width, num_classes), np.float16
+
+        self.input_shm = shared_memory.SharedMemory(create=True, size=int(np.prod(inputs_shape)) * 4)
+        self.output_shm = shared_memory.SharedMemory(create=True, size=int(np.prod(outputs_shape)) * np.dtype(outputs_dtype).itemsize)
+        self.inputs = np.ndarray(inputs_shape, dtype=np.float32, buffer=self.input_shm.buf)
+        self.outputs = np.ndarray(outputs_shape, dtype=outputs_dtype, buffer=self.output_shm.buf)
+
+        logger.info(f"Menjalankan {self.num_workers} worker inferensi ({self.threads_per_worker} thread/worker)")
+        # spawn: TensorFlow tidak aman di-fork
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                model_name, backend, precision, output, self.threads_per_worker,
+                (self.input_shm.name, inputs_shape, np.float32),
+                (self.output_shm.name, outputs_shape, outputs_dtype),
+            ),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        for shm in (self.input_shm, self.output_shm):
+            shm.close()
+            shm.unlink()
+
+    def _collect(self, pending, free):
+        future, slot, positions = pending.popleft()
+        future.result()
+        results = self.outputs[slot, :len(positions)].copy()
+        free.append(slot)
+        return zip(positions, results)
+
+    def predict(self, batches):
+        """Consume (positions, batch) pairs and yield ((y, x), prediction) in the same order."""
+        free = list(range(self.num_slots))
+        pending = deque()
+
+        for positions, batch in batches:
+            if not free:
+                yield from self._collect(pending, free)
+
+            slot = free.pop()
+            self.inputs[slot, :len(batch)] = batch
+            pending.append((self.executor.submit(_predict_slot, slot, len(batch)), slot, positions))
+
+        while pending:
+            yield from self._collect(pending, free)
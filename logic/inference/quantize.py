@@ -0,0 +1,128 @@
+import argparse
+import numpy as np
+import pandas as pd
+import rasterio
+import tensorflow as tf
+
+from logic.classification.patch_reader import WindowedPatchReader
+from logic.inference.model_registry import MODELS, model_registry
+from logic.sentinel_classification.utils import get_file_paths_for_images_and_labels
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# ================================
+# Data kalibrasi (layout data/images, data/labels)
+# ================================
+
+def load_tile(name: str, image_path: str):
+    """Read a training tile with the same preprocessing the app uses for this model."""
+    spec = MODELS[name]
+    with WindowedPatchReader(image_path, bands=spec["bands"], patch_size=256, overlap=0, stretch=spec["stretch"]) as reader:
+        tile = reader.read_patch(0, 0).astype(np.float32)
+    return tile / 255.0 if spec["stretch"] else tile
+
+def load_label(label_path: str):
+    with rasterio.open(label_path) as src:
+        return src.read(1, window=((0, 256), (0, 256)), boundless=True, fill_value=255)
+
+def representative_dataset(name: str, image_paths, num_samples: int = 100):
+    def generator():
+        step = max(1, len(image_paths) // num_samples)
+        for image_path in image_paths[::step][:num_samples]:
+            yield [load_tile(name, image_path)[None]]
+    return generator
+
+# ================================
+# Kuantisasi
+# ================================
+
+def quantize(name: str, precision: str, images_dir: str = None, labels_dir: str = None, num_samples: int = 100) -> str:
+    model = model_registry.get(name).model
+    output_path = model_registry.resolve_path(name, "tflite", precision)
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if precision == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+    elif precision == "int8":
+        image_paths, _ = get_file_paths_for_images_and_labels(images_dir, labels_dir)
+        if not image_paths:
+            raise ValueError("Data kalibrasi tidak ditemukan di folder images")
+        converter.representative_dataset = representative_dataset(name, image_paths, num_samples)
+        # input/output tetap float32 agar TFLiteBackend tidak perlu diubah
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+            tf.lite.OpsSet.TFLITE_BUILTINS,
+            tf.lite.OpsSet.SELECT_TF_OPS,
+        ]
+    else:
+        raise ValueError(f"Presisi tidak didukung: {precision}")
+
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+    logger.info(f"Model {precision} disimpan: {output_path}")
+    return output_path
+
+# ================================
+# Laporan IoU per kelas
+# ================================
+
+def confusion_matrix(labels, predictions, num_classes, ignore_value=255):
+    valid = labels != ignore_value
+    index = labels[valid].astype(np.int64) * num_classes + predictions[valid]
+    return np.bincount(index, minlength=num_classes ** 2).reshape(num_classes, num_classes)
+
+def iou_per_class(confusion):
+    intersection = np.diag(confusion)
+    union = confusion.sum(axis=0) + confusion.sum(axis=1) - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1), np.nan)
+
+def iou_drift_report(name: str, precision: str, images_dir: str = None, labels_dir: str = None, batch_size: int = 16):
+    """Per-class IoU of the float model and the quantized model against the labels, plus the drift."""
+    image_paths, label_paths = get_file_paths_for_images_and_labels(images_dir, labels_dir)
+    reference = model_registry.get(name)
+    quantized = model_registry.get(name, "tflite", precision)
+
+    num_classes = reference.model.output_shape[-1]
+    confusion_float = np.zeros((num_classes, num_classes), dtype=np.int64)
+    confusion_quant = np.zeros((num_classes, num_classes), dtype=np.int64)
+
+    for start in range(0, len(image_paths), batch_size):
+        tiles = np.stack([load_tile(name, path) for path in image_paths[start:start + batch_size]])
+        labels = np.stack([load_label(path) for path in label_paths[start:start + batch_size]])
+        labels[labels >= num_classes] = 255
+
+        confusion_float += confusion_matrix(labels, reference.predict(tiles, output="argmax"), num_classes)
+        confusion_quant += confusion_matrix(labels, quantized.predict(tiles, output="argmax"), num_classes)
+
+    report = pd.DataFrame({
+        "class": range(num_classes),
+        "iou_float32": iou_per_class(confusion_float),
+        f"iou_{precision}": iou_per_class(confusion_quant),
+    })
+    report["drift"] = report[f"iou_{precision}"] - report["iou_float32"]
+    return report
+
+if __name__ == "__main__":
+    # python -m logic.inference.quantize --model sentinel --precision int8 --report
+    parser = argparse.ArgumentParser(description="Post-training quantization of the classification models to TFLite.")
+    parser.add_argument("--model", type=str, required=True, choices=list(MODELS), help="Model to quantize.")
+    parser.add_argument("--precision", type=str, default="int8", choices=["float16", "int8"], help="Target precision.")
+    parser.add_argument("--images-dir", type=str, default=None, help="Calibration images (default: data/images).")
+    parser.add_argument("--labels-dir", type=str, default=None, help="Labels for the IoU report (default: data/labels).")
+    parser.add_argument("--num-samples", type=int, default=100, help="Number of calibration tiles for int8.")
+    parser.add_argument("--report", action="store_true", help="Print per-class IoU drift against the float model.")
+    parser.add_argument("--report-csv", type=str, default=None, help="Also save the IoU report as CSV.")
+
+    args = parser.parse_args()
+
+    quantize(args.model, args.precision, args.images_dir, args.labels_dir, args.num_samples)
+
+    if args.report or args.report_csv:
+        report = iou_drift_report(args.model, args.precision, args.images_dir, args.labels_dir)
+        logger.info(f"IoU per kelas ({args.model}, {args.precision}):\n{report.to_string(index=False)}")
+        if args.report_csv:
+            report.to_csv(args.report_csv, index=False)
@@ -0,0 +1,80 @@
+import json
+import os
+import sqlite3
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+class DownloadManifest:
+    """
+    Checkpoint of a tile download job, stored as SQLite next to the output file.
+
+    Records the status and number of attempts of every tile. A job started again with the same
+    parameters (provider, zoom, polygon, output) picks up the existing manifest and only fetches
+    tiles that are not done yet; a different job resets it.
+    """
+
+    def __init__(self, output_path: str, job: dict):
+        self.path = f"{output_path}.manifest"
+        self.job = json.dumps(job, sort_keys=True)
+
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS job (spec TEXT);
+            CREATE TABLE IF NOT EXISTS tiles (
+                x INTEGER, y INTEGER, status TEXT, attempts INTEGER DEFAULT 0,
+                PRIMARY KEY (x, y)
+            );
+        """)
+
+        row = self.connection.execute("SELECT spec FROM job").fetchone()
+        self.resumed = row is not None and row[0] == self.job and os.path.exists(output_path)
+        if not self.resumed:
+            self.connection.execute("DELETE FROM job")
+            self.connection.execute("DELETE FROM tiles")
+            self.connection.execute("INSERT INTO job (spec) VALUES (?)", (self.job,))
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
+
+    def add_tiles(self, positions):
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO tiles (x, y, status) VALUES (?, ?, ?)",
+            [(x, y, PENDING) for x, y in positions]
+        )
+        self.connection.commit()
+
+    def remaining(self):
+        """Tiles that still have to be fetched (pending or failed in an earlier run)."""
+        return self.connection.execute(
+            "SELECT x, y FROM tiles WHERE status != ? ORDER BY y, x", (DONE,)
+        ).fetchall()
+
+    def mark(self, positions, status: str):
+        self.connection.executemany(
+            "UPDATE tiles SET status=?, attempts=attempts + 1 WHERE x=? AND y=?",
+            [(status, x, y) for x, y in positions]
+        )
+        self.connection.commit()
+
+    def summary(self) -> dict:
+        return dict(self.connection.execute("SELECT status, COUNT(*) FROM tiles GROUP BY status").fetchall())
+
+    def remove(self):
+        self.close()
+        os.remove(self.path)
@@ -1,6 +1,5 @@
-import requests
+import os
 import mercantile
-import rasterio
 import numpy as np
 
 from io import BytesIO
@@ -8,9 +7,12 @@ from PIL import Image
 from shapely.geometry import Polygon
 from PyQt6.QtCore import QThread, QObject, pyqtSignal
 from typing import Optional
-from rasterio.transform import from_origin, Affine
-from pyproj import CRS, Transformer
 
+from .tile_cache import TileCache
+from .download_manifest import DONE, FAILED, DownloadManifest
+from .georeference import WEB_MERCATOR, mercator_transform, pixel_box, utm_epsg, warp_to_utm
+from .mosaic_writer import MosaicWriter
+from .tile_fetcher import TileFetcher, tile_to_quadkey
 from .tile_providers import TILE_PROVIDERS
 from utils.common import get_file_extension
 from utils.logger import setup_logger
@@ -27,24 +29,38 @@ class DownloadTiles(QThread):
             zoom_level: int,
             polygon: Polygon,
             output_path: str,
+            max_workers: int = 16,
+            use_cache: bool = True,
+            offline: bool = False,
+            utm: bool = False,
             parent: Optional[QObject] = None
         ) -> None:
         super().__init__(parent)
         self.zoom = zoom_level
         self.polygon = polygon
         self.output_path = output_path
+        self.max_workers = max_workers
+        self.use_cache = use_cache or offline
+        self.offline = offline  # mosaik hanya dari cache, tanpa jaringan
+        self.tile_size = 256  # diperbarui dari tile pertama yang diunduh
+
+        # mosaik ditulis dalam EPSG:3857, utm=True mewarp hasilnya ke zona UTM setempat
+        self.utm = utm
+        root, ext = os.path.splitext(output_path)
+        self.mosaic_path = f"{root}_3857{ext}" if utm else output_path
 
         self.tile_provider = tile_provider
-        self.tile_url = next((tile_provider["url"] for tile_provider in TILE_PROVIDERS if tile_provider["name"] == self.tile_provider), None)
+        self.provider = next((tile_provider for tile_provider in TILE_PROVIDERS if tile_provider["name"] == self.tile_provider), None)
+        self.tile_url = self.provider["url"] if self.provider else None
 
     def run(self):
         try:
-            merged_image, tile_range = self.download_tiles()   
-            cropped_image = self.crop_image(merged_image, tile_range)
-
             if get_file_extension(self.output_path) == "tif":
-                self.save_as_tiff(cropped_image)
+                # tile langsung ditulis ke GeoTIFF, tanpa mosaik penuh di memori
+                self.download_to_tiff()
             else:
+                merged_image, tile_range = self.download_tiles()   
+                cropped_image = self.crop_image(merged_image, tile_range)
                 cropped_image.save(self.output_path) 
             
             self.finish_signal.emit()   
@@ -54,16 +70,7 @@ class DownloadTiles(QThread):
 
     def tile_to_quadkey(self, x, y):
         """Convert tile coordinates to a Bing Maps quadkey."""
-        quadkey = ""
-        for i in range(self.zoom, 0, -1):
-            digit = 0
-            mask = 1 << (i - 1)
-            if (x & mask) != 0:
-                digit += 1
-            if (y & mask) != 0:
-                digit += 2
-            quadkey += str(digit)
-        return quadkey
+        return tile_to_quadkey(x, y, self.zoom)
 
     def get_tile_bounds(self):
         """Get the tile range (x, y) covering the polygon at a given zoom level."""
@@ -81,136 +88,144 @@ class DownloadTiles(QThread):
 
     def download_tile(self, x, y):
         """Download a single tile from the server."""
-        if self.tile_provider == "Bing Maps":
-            quadkey = self.tile_to_quadkey(x, y)
-            url = self.tile_url.format(quadkey=quadkey)
-        else:
-            url = self.tile_url.format(x=x, y=y, z=self.zoom)
-
-        response = requests.get(url, stream=True)
-        if response.status_code == 200:
-            return Image.open(BytesIO(response.content))
-        else:
-            logger.warning(f"Failed to download tile {x},{y} at zoom {self.zoom}")
-            return None
+        with self.create_fetcher(max_workers=1) as fetcher:
+            content = fetcher.fetch(self.zoom, x, y)
+        return Image.open(BytesIO(content)) if content else None
+
+    def create_fetcher(self, max_workers: int):
+        cache = TileCache(self.tile_provider) if self.use_cache else None
+        return TileFetcher(self.provider, max_workers, cache=cache, offline=self.offline)
 
     def download_tiles(self):
-        """Download all tiles covering the polygon and merge them into a single image."""
+        """Download all tiles covering the polygon concurrently and merge them into a single image."""
         x_min, x_max, y_min, y_max = self.get_tile_bounds()
+        positions = [(x, y) for y in range(y_min, y_max + 1) for x in range(x_min, x_max + 1)]
+        logger.info(f"Mengunduh {len(positions)} tile dengan {self.max_workers} worker")
 
-        tiles = []
-        for y in range(y_min, y_max + 1):
-            row_tiles = []
-            for x in range(x_min, x_max + 1):
-                tile = self.download_tile(x, y)
-                if tile:
-                    row_tiles.append(tile)
-            if row_tiles:
-                tiles.append(row_tiles)
+        tiles = {}
+        with self.create_fetcher(self.max_workers) as fetcher:
+            for (x, y), content in fetcher.fetch_many(self.zoom, positions):
+                if content:
+                    tiles[(x, y)] = Image.open(BytesIO(content))
 
         if not tiles:
-            raise ValueError("No tiles downloaded!")
+            raise ValueError("No tiles in cache for this area!" if self.offline else "No tiles downloaded!")
 
-        # Merge tiles into a single image
-        tile_width, tile_height = tiles[0][0].size  # 256x256 by default
+        # Merge tiles into a single image, tile yang gagal dibiarkan hitam di posisinya
+        tile_width, tile_height = next(iter(tiles.values())).size  # 256x256 by default
         self.tile_size = tile_width
         merged_width = (x_max - x_min + 1) * self.tile_size
         merged_height = (y_max - y_min + 1) * self.tile_size
 
         merged_image = Image.new("RGB", (merged_width, merged_height))
-        for row_idx, row in enumerate(tiles):
-            for col_idx, tile in enumerate(row):
-                merged_image.paste(tile, (col_idx * tile_width, row_idx * tile_height))
+        for (x, y), tile in tiles.items():
+            merged_image.paste(tile, ((x - x_min) * tile_width, (y - y_min) * tile_height))
 
         return merged_image, (x_min, y_min, x_max, y_max)
 
-    def lonlat_to_pixel(self, lon, lat, tile_range):
-        """Convert lat/lon to pixel coordinates in the merged image."""
-        x_min, y_min, _, _ = tile_range
+    def download_to_tiff(self, checkpoint_every: int = 500):
+        """
+        Stream every downloaded tile into its window of a tiled GeoTIFF cropped to the polygon.
 
-        tile = mercantile.tile(lon, lat, self.zoom)
-        xtile, ytile = tile.x, tile.y
-        bbox = mercantile.bounds(xtile, ytile, self.zoom)
+        Progress is checkpointed in a DownloadManifest next to the output: every
+        checkpoint_every tiles the GeoTIFF is flushed and the tiles are marked done, so an
+        interrupted job started again with the same parameters only fetches what is missing.
+        Tiles that still fail after the fetcher's retries stay nodata in the output.
+        """
+        x_min, x_max, y_min, y_max = self.get_tile_bounds()
+        tile_range = (x_min, y_min, x_max, y_max)
+        positions = [(x, y) for y in range(y_min, y_max + 1) for x in range(x_min, x_max + 1)]
+
+        with DownloadManifest(self.mosaic_path, {
+            "provider": self.tile_provider,
+            "zoom": self.zoom,
+            "polygon": self.polygon.wkt,
+            "output": os.path.abspath(self.mosaic_path),
+        }) as manifest:
+            manifest.add_tiles(positions)
+            remaining = manifest.remaining()
+            if manifest.resumed:
+                logger.info(f"Melanjutkan unduhan: {len(remaining)} dari {len(positions)} tile tersisa")
+            logger.info(f"Mengunduh {len(remaining)} tile dengan {self.max_workers} worker")
+
+            writer = None
+            written, failed = [], []
+            try:
+                with self.create_fetcher(self.max_workers) as fetcher:
+                    for (x, y), content in fetcher.fetch_many(self.zoom, remaining):
+                        if not content:
+                            failed.append((x, y))
+                            continue
+
+                        tile = np.asarray(Image.open(BytesIO(content)).convert("RGB"))
+                        if writer is None:
+                            # ukuran tile baru diketahui setelah tile pertama
+                            self.tile_size = tile.shape[1]
+                            writer = self.create_mosaic_writer(tile_range, resume=manifest.resumed)
+                        writer.write_tile(x - x_min, y - y_min, tile)
+                        written.append((x, y))
+
+                        if len(written) >= checkpoint_every:
+                            writer.checkpoint()
+                            manifest.mark(written, DONE)
+                            written = []
+            finally:
+                # tile yang sudah ditulis aman setelah file ditutup
+                if writer is not None:
+                    writer.close()
+                manifest.mark(written, DONE)
+                manifest.mark(failed, FAILED)
+
+            summary = manifest.summary()
+            if not summary.get(DONE):
+                manifest.remove()
+                raise ValueError("No tiles in cache for this area!" if self.offline else "No tiles downloaded!")
+
+            if summary.get(FAILED):
+                logger.warning(f"{summary[FAILED]} tile gagal diunduh dan ditulis sebagai nodata, jalankan ulang untuk mencoba lagi")
+            else:
+                manifest.remove()
 
-        # Convert lon/lat to pixel coordinates within the tile
-        px = int(((lon - bbox.west) / (bbox.east - bbox.west)) * self.tile_size)
-        py = int(((bbox.north - lat) / (bbox.north - bbox.south)) * self.tile_size)
+        if self.utm:
+            # mosaik EPSG:3857 disimpan selama masih ada tile yang perlu dicoba ulang
+            self.warp_to_utm(keep_mosaic=bool(summary.get(FAILED)))
+        logger.info(f"Saved: {self.output_path}")
 
-        # Convert to pixel coordinates in the merged image
-        px += (xtile - x_min) * self.tile_size
-        py += (ytile - y_min) * self.tile_size
+    def create_mosaic_writer(self, tile_range, resume: bool = False):
+        left, top, right, bottom = self.crop_box(tile_range)
+        width, height = right - left, bottom - top
+        crs, transform = self.georeference(tile_range, left, top)
+        return MosaicWriter(self.mosaic_path, left, top, width, height, self.tile_size, crs, transform, resume=resume)
 
-        return px, py
+    def crop_box(self, tile_range):
+        """Bounding box (left, top, right, bottom) of the polygon in mosaic pixel coordinates."""
+        x_min, y_min, _, _ = tile_range
+
+        # semua vertex dikonversi sekaligus
+        left, top, right, bottom = pixel_box(self.polygon.exterior.coords, self.zoom, self.tile_size)
+        left, right = left - x_min * self.tile_size, right - x_min * self.tile_size
+        top, bottom = top - y_min * self.tile_size, bottom - y_min * self.tile_size
+        return left, top, right, bottom
 
     def crop_image(self, image, tile_range):
         """Crop the merged image to the exact polygon shape."""
-        # Convert polygon to pixel coordinates
-        poly_pixels = [self.lonlat_to_pixel(lon, lat, tile_range) for lon, lat in self.polygon.exterior.coords]
-
-        # Get bounding box in pixel coordinates
-        x_coords, y_coords = zip(*poly_pixels)
-        x_min, x_max = min(x_coords), max(x_coords)
-        y_min, y_max = min(y_coords), max(y_coords)
-
         # Crop the image to the bounding box
-        cropped_image = image.crop((x_min, y_min, x_max, y_max))
+        cropped_image = image.crop(self.crop_box(tile_range))
 
         return cropped_image
     
     def get_utm_crs(self, lon, lat):
         """Menentukan EPSG UTM berdasarkan koordinat longitude dan latitude."""
-        utm_zone = int((lon + 180) / 6) + 1
-        is_southern = lat < 0  # Cek apakah di belahan bumi selatan
-        epsg_code = 32700 + utm_zone if is_southern else 32600 + utm_zone
-        return epsg_code
+        return utm_epsg(lon, lat)
     
-    def save_as_tiff(self, image):
-        """Menyimpan gambar yang telah di-crop sebagai GeoTIFF dengan CRS proyeksi."""
-
-        # Bounding box dari polygon dalam EPSG:4326 (WGS 84)
-        lon_min, lat_min, lon_max, lat_max = self.polygon.bounds
-        
-        # Tentukan EPSG UTM berdasarkan lokasi (Samarinda: UTM 50S, EPSG:32750)
-        epsg_code = self.get_utm_crs((lon_min + lon_max) / 2, (lat_min + lat_max) / 2)
-        utm_crs = CRS.from_epsg(epsg_code)
-        logger.info(f"Using EPSG:{epsg_code}")
-
-        # Transformasi dari WGS 84 ke UTM
-        transformer = Transformer.from_crs("EPSG:4326", utm_crs, always_xy=True)
-        x_min, y_min = transformer.transform(lon_min, lat_min) # Bottom-left
-        x_max, y_max = transformer.transform(lon_max, lat_max) # Top-right
-
-        # Hitung resolusi berdasarkan ukuran tile
-        width, height = image.size
-        res_x = (x_max - x_min) / width # pixel resolution
-        res_y = (y_max - y_min) / height # pixel resolution
-        transform = Affine(
-            res_x, 0, x_min,  # Scale X, Shear X, Origin X (Top-left X)
-            0, -res_y, y_max  # Shear Y, Scale Y (Negative), Origin Y (Top-left Y)
-        )
-
-        # Konversi gambar menjadi array numpy
-        image_array = np.array(image)
-
-        # Pastikan gambar memiliki 3 band (RGB)
-        if len(image_array.shape) == 2:
-            image_array = np.expand_dims(image_array, axis=2)  # Ubah grayscale ke RGB
-        if image_array.shape[2] == 4:  # Jika ada alpha channel, hapus
-            image_array = image_array[:, :, :3]
-
-        # Simpan sebagai GeoTIFF dengan CRS yang sesuai
-        with rasterio.open(
-            self.output_path,
-            "w",
-            driver="GTiff",
-            height=image_array.shape[0],
-            width=image_array.shape[1],
-            count=3,  # RGB
-            dtype=image_array.dtype,
-            crs=utm_crs.to_wkt(),  # CRS dalam format WKT
-            transform=transform
-        ) as dst:
-            for i in range(3):  # Simpan masing-masing band RGB
-                dst.write(image_array[:, :, i], i + 1)
-
-        logger.info(f"Saved: {self.output_path} with EPSG:{epsg_code}")
\ No newline at end of file
+    def georeference(self, tile_range, left, top):
+        """CRS (EPSG:3857) dan transform eksak untuk citra hasil crop yang dimulai di pixel (left, top) mosaik."""
+        x_min, y_min, _, _ = tile_range
+        transform = mercator_transform(x_min * self.tile_size + left, y_min * self.tile_size + top, self.zoom, self.tile_size)
+        return WEB_MERCATOR, transform
+
+    def warp_to_utm(self, keep_mosaic: bool = False):
+        """Warp mosaik EPSG:3857 ke UTM pada output_path."""
+        warp_to_utm(self.mosaic_path, self.output_path, num_threads=self.max_workers)
+        if not keep_mosaic:
+            os.remove(self.mosaic_path)
@@ -0,0 +1,116 @@
+import math
+import numpy as np
+import rasterio
+
+from rasterio.crs import CRS
+from rasterio.enums import Resampling
+from rasterio.transform import Affine
+from rasterio.warp import calculate_default_transform, reproject, transform_bounds
+from rasterio.windows import Window, transform as window_transform
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+WEB_MERCATOR = "EPSG:3857"
+EARTH_RADIUS = 6378137.0
+ORIGIN_SHIFT = math.pi * EARTH_RADIUS  # setengah keliling bumi di ekuator (meter)
+MAX_LATITUDE = 85.0511287798066
+
+def lonlat_to_global_pixel(lon, lat, zoom: int, tile_size: int = 256):
+    """
+    Web Mercator pixel coordinates of lon/lat points at a zoom level, counted from the top-left
+    corner of the world (tile 0, 0). Accepts scalars or arrays and converts all points in one pass.
+    """
+    world_size = tile_size * 2 ** zoom
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.radians(np.clip(np.asarray(lat, dtype=np.float64), -MAX_LATITUDE, MAX_LATITUDE))
+
+    x = (lon + 180.0) / 360.0 * world_size
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / math.pi) / 2.0 * world_size
+    return x, y
+
+def pixel_box(coords, zoom: int, tile_size: int = 256):
+    """Integer bounding box (left, top, right, bottom) of lon/lat coords in global pixel coordinates."""
+    coords = np.asarray(coords, dtype=np.float64)
+    x, y = lonlat_to_global_pixel(coords[:, 0], coords[:, 1], zoom, tile_size)
+    return int(np.floor(x.min())), int(np.floor(y.min())), int(np.ceil(x.max())), int(np.ceil(y.max()))
+
+def resolution(zoom: int, tile_size: int = 256) -> float:
+    """Pixel size in EPSG:3857 meters at a zoom level."""
+    return 2 * ORIGIN_SHIFT / (tile_size * 2 ** zoom)
+
+def mercator_transform(left: float, top: float, zoom: int, tile_size: int = 256) -> Affine:
+    """Exact EPSG:3857 transform of an image whose top-left corner is global pixel (left, top)."""
+    res = resolution(zoom, tile_size)
+    return Affine(res, 0, -ORIGIN_SHIFT + left * res, 0, -res, ORIGIN_SHIFT - top * res)
+
+def utm_epsg(lon: float, lat: float) -> int:
+    """Menentukan EPSG UTM berdasarkan koordinat longitude dan latitude."""
+    utm_zone = int((lon + 180) / 6) + 1
+    return (32700 if lat < 0 else 32600) + utm_zone
+
+def warp_to_utm(
+        src_path: str,
+        dst_path: str,
+        epsg: int = None,
+        resampling: Resampling = Resampling.bilinear,
+        num_threads: int = 4,
+        block_size: int = 512,
+        compress: str = "deflate"
+    ):
+    """
+    Reproject a Web Mercator mosaic to UTM (zone of its center unless epsg is given).
+
+    The output is written block by block: every window is warped on its own with
+    rasterio.warp.reproject, which reads only the source area it needs and runs the warper on
+    num_threads threads. Areas without imagery (0 in every band) stay nodata in the output mask.
+    """
+    with rasterio.Env(GDAL_TIFF_INTERNAL_MASK=True), rasterio.open(src_path) as src:
+        if epsg is None:
+            west, south, east, north = transform_bounds(src.crs, "EPSG:4326", *src.bounds)
+            epsg = utm_epsg((west + east) / 2, (south + north) / 2)
+        dst_crs = CRS.from_epsg(epsg)
+        logger.info(f"Using EPSG:{epsg}")
+
+        transform, width, height = calculate_default_transform(src.crs, dst_crs, src.width, src.height, *src.bounds)
+        profile = {
+            "driver": "GTiff",
+            "width": width,
+            "height": height,
+            "count": src.count,
+            "dtype": src.dtypes[0],
+            "crs": dst_crs,
+            "transform": transform,
+            "tiled": True,
+            "blockxsize": block_size,
+            "blockysize": block_size,
+            "compress": compress,
+            "BIGTIFF": "IF_SAFER",
+        }
+        if src.count == 3:
+            profile["photometric"] = "RGB"
+
+        bands = list(range(1, src.count + 1))
+        with rasterio.open(dst_path, "w", **profile) as dst:
+            for row in range(0, height, block_size):
+                for col in range(0, width, block_size):
+                    window = Window(col, row, min(block_size, width - col), min(block_size, height - row))
+                    data = np.zeros((src.count, window.height, window.width), dtype=src.dtypes[0])
+                    reproject(
+                        source=rasterio.band(src, bands),
+                        destination=data,
+                        src_transform=src.transform,
+                        src_crs=src.crs,
+                        src_nodata=0,
+                        dst_transform=window_transform(window, transform),
+                        dst_crs=dst_crs,
+                        dst_nodata=0,
+                        resampling=resampling,
+                        num_threads=num_threads
+                    )
+                    dst.write(data, window=window)
+                    dst.write_mask(np.where(data.any(axis=0), 255, 0).astype(np.uint8), window=window)
+
+    logger.info(f"Saved: {dst_path}")
+    return dst_path
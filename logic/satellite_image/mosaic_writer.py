@@ -0,0 +1,91 @@
+import numpy as np
+import rasterio
+
+from rasterio.windows import Window
+
+class MosaicWriter:
+    """
+    Writes decoded map tiles straight into their window of a tiled GeoTIFF, so the full
+    mosaic never exists in memory.
+
+    The output covers the crop box (left, top, width, height) in pixel coordinates of the tile
+    mosaic; the crop is applied as a window offset and tile parts outside it are dropped.
+
+    Written areas are flagged in an internal mask band, so tiles that never arrive are nodata
+    rather than black. resume=True reopens an existing output to continue a job.
+    """
+
+    def __init__(
+            self,
+            output_path: str,
+            left: int,
+            top: int,
+            width: int,
+            height: int,
+            tile_size: int,
+            crs,
+            transform,
+            count: int = 3,
+            compress: str = "deflate",
+            block_size: int = 256,
+            resume: bool = False
+        ):
+        self.output_path = output_path
+        self.left, self.top = left, top
+        self.width, self.height = width, height
+        self.tile_size = tile_size
+        self.count = count
+
+        profile = {
+            "driver": "GTiff",
+            "width": width,
+            "height": height,
+            "count": count,
+            "dtype": rasterio.uint8,
+            "crs": crs,
+            "transform": transform,
+            "tiled": True,
+            "blockxsize": block_size,
+            "blockysize": block_size,
+            "compress": compress,
+            "BIGTIFF": "IF_SAFER",
+        }
+        if count == 3:
+            profile["photometric"] = "RGB"
+
+        # mask disimpan di dalam TIFF, bukan file .msk terpisah
+        self.env = rasterio.Env(GDAL_TIFF_INTERNAL_MASK=True)
+        self.env.__enter__()
+        self.dst = rasterio.open(output_path, "r+") if resume else rasterio.open(output_path, "w", **profile)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.dst.close()
+        self.env.__exit__(None, None, None)
+
+    def checkpoint(self):
+        """Flush every written block to disk by closing and reopening the file."""
+        self.dst.close()
+        self.dst = rasterio.open(self.output_path, "r+")
+
+    def write_tile(self, col: int, row: int, tile: np.ndarray):
+        """Write an (H, W, C) tile at tile index (col, row) of the mosaic."""
+        x0 = col * self.tile_size - self.left
+        y0 = row * self.tile_size - self.top
+
+        # potong tile ke area crop
+        left, top = max(0, x0), max(0, y0)
+        right = min(self.width, x0 + tile.shape[1])
+        bottom = min(self.height, y0 + tile.shape[0])
+        if right <= left or bottom <= top:
+            return
+
+        data = tile[top - y0:bottom - y0, left - x0:right - x0, :self.count]
+        window = Window(left, top, right - left, bottom - top)
+        self.dst.write(np.moveaxis(data, -1, 0), window=window)
+        self.dst.write_mask(np.full(data.shape[:2], 255, dtype=np.uint8), window=window)
@@ -0,0 +1,160 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from typing import NamedTuple, Optional
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+DEFAULT_CACHE_DIR = os.path.join(os.getcwd(), "cache", "tiles")
+
+class CachedTile(NamedTuple):
+    data: bytes
+    etag: Optional[str]
+    fresh: bool
+
+class TileCache:
+    """
+    Persistent tile cache, one MBTiles (SQLite) file per provider.
+
+    The tiles table follows the MBTiles layout (zoom_level, tile_column, tile_row in TMS order,
+    tile_data) so the file opens in GIS tools, with extra columns for the ETag, fetch time and
+    last access used for TTL revalidation and size-based LRU eviction. Last-access times of
+    cache hits are buffered and written in batches, so hits do not cost a commit each.
+    """
+
+    def __init__(
+            self,
+            provider_name: str,
+            cache_dir: str = DEFAULT_CACHE_DIR,
+            max_bytes: int = 2 << 30,
+            ttl: float = 30 * 24 * 3600,
+            access_flush_every: int = 256
+        ):
+        os.makedirs(cache_dir, exist_ok=True)
+        slug = re.sub(r"[^a-z0-9]+", "_", provider_name.lower()).strip("_")
+        self.path = os.path.join(cache_dir, f"{slug}.mbtiles")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        # accessed_at dikumpulkan di memori, satu commit per access_flush_every hit
+        self.access_flush_every = access_flush_every
+        self.accessed = {}
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS tiles (
+                zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB,
+                etag TEXT, size INTEGER, fetched_at REAL, accessed_at REAL,
+                PRIMARY KEY (zoom_level, tile_column, tile_row)
+            );
+            CREATE INDEX IF NOT EXISTS tiles_accessed_at ON tiles (accessed_at);
+        """)
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO metadata (name, value) VALUES (?, ?)",
+            [("name", provider_name), ("format", "jpg"), ("type", "baselayer")]
+        )
+        self.connection.commit()
+        self.total_bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM tiles").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        with self.lock:
+            self._flush_accessed()
+            self.connection.close()
+
+    def _flush_accessed(self):
+        """Write the buffered accessed_at updates (caller holds the lock)."""
+        if not self.accessed:
+            return
+        self.connection.executemany(
+            "UPDATE tiles SET accessed_at=? WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+            [(accessed_at, *key) for key, accessed_at in self.accessed.items()]
+        )
+        self.connection.commit()
+        self.accessed = {}
+
+    @staticmethod
+    def key(z: int, x: int, y: int):
+        # MBTiles menyimpan baris dalam skema TMS (y dibalik)
+        return z, x, (1 << z) - 1 - y
+
+    def get(self, z: int, x: int, y: int) -> Optional[CachedTile]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT tile_data, etag, fetched_at FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                self.key(z, x, y)
+            ).fetchone()
+            if row is None:
+                return None
+            self.accessed[self.key(z, x, y)] = time.time()
+            if len(self.accessed) >= self.access_flush_every:
+                self._flush_accessed()
+
+        data, etag, fetched_at = row
+        return CachedTile(data, etag, time.time() - fetched_at < self.ttl)
+
+    def put(self, z: int, x: int, y: int, data: bytes, etag: str = None):
+        now = time.time()
+        with self.lock:
+            previous = self.connection.execute(
+                "SELECT size FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?", self.key(z, x, y)
+            ).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*self.key(z, x, y), data, etag, len(data), now, now)
+            )
+            self.connection.commit()
+            self.accessed.pop(self.key(z, x, y), None)
+            self.total_bytes += len(data) - (previous[0] if previous else 0)
+
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def touch(self, z: int, x: int, y: int):
+        """Mark a tile as fresh again after a 304 Not Modified."""
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "UPDATE tiles SET fetched_at=?, accessed_at=? WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                (now, now, *self.key(z, x, y))
+            )
+            self.connection.commit()
+            self.accessed.pop(self.key(z, x, y), None)
+
+    def evict(self, target_ratio: float = 0.9):
+        """Delete least recently used tiles until the cache is below target_ratio * max_bytes."""
+        with self.lock:
+            # urutan LRU butuh accessed_at terbaru
+            self._flush_accessed()
+            target = self.max_bytes * target_ratio
+            removed = 0
+            rows = self.connection.execute(
+                "SELECT zoom_level, tile_column, tile_row, size FROM tiles ORDER BY accessed_at"
+            ).fetchall()
+
+            stale = []
+            for zoom_level, tile_column, tile_row, size in rows:
+                if self.total_bytes - removed <= target:
+                    break
+                stale.append((zoom_level, tile_column, tile_row))
+                removed += size
+
+            self.connection.executemany(
+                "DELETE FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?", stale
+            )
+            self.connection.commit()
+            self.total_bytes -= removed
+        logger.info(f"Cache tile: {len(stale)} tile lama dihapus ({removed / 2**20:.1f} MB)")
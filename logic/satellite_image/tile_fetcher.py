@@ -0,0 +1,197 @@
+import random
+import threading
+import time
+import requests
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import cycle, islice
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+
+from .tile_cache import TileCache
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# status yang layak dicoba ulang (rate limit / gangguan server)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+def tile_to_quadkey(x: int, y: int, zoom: int) -> str:
+    """Convert tile coordinates to a Bing Maps quadkey."""
+    quadkey = ""
+    for i in range(zoom, 0, -1):
+        digit = 0
+        mask = 1 << (i - 1)
+        if (x & mask) != 0:
+            digit += 1
+        if (y & mask) != 0:
+            digit += 2
+        quadkey += str(digit)
+    return quadkey
+
+class RateLimiter:
+    """Token bucket shared by all workers of one provider (rate in requests per second, 0 = unlimited)."""
+
+    def __init__(self, rate: float = 0, burst: int = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class TileFetcher:
+    """
+    Fetches XYZ / quadkey tiles with a bounded thread pool.
+
+    One keep-alive requests.Session is kept per host, with a connection pool as large as the
+    worker pool. Requests are spread over the provider's host shards ({s} in the url) and
+    throttled by a per-provider token bucket.
+
+    With a TileCache, fresh cached tiles are served without a request and expired ones are
+    revalidated with If-None-Match. offline=True serves only what is in the cache. The cache
+    is closed together with the fetcher.
+
+    Connection errors and retryable statuses (429, 5xx) are retried with exponential backoff
+    and full jitter.
+    """
+
+    def __init__(
+            self,
+            provider: dict,
+            max_workers: int = 16,
+            timeout: float = 30,
+            cache: TileCache = None,
+            offline: bool = False,
+            retries: int = 4,
+            backoff: float = 0.5,
+            max_backoff: float = 30
+        ):
+        self.url = provider["url"]
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cache = cache
+        self.offline = offline
+
+        self.shards = cycle(provider.get("subdomains") or [""])
+        self.rate_limiter = RateLimiter(provider.get("rate_limit", 0))
+
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+        if self.cache:
+            self.cache.close()
+
+    def tile_url(self, z: int, x: int, y: int) -> str:
+        with self.lock:
+            shard = next(self.shards)
+        return self.url.format(x=x, y=y, z=z, s=shard, quadkey=tile_to_quadkey(x, y, z))
+
+    def session_for(self, url: str) -> requests.Session:
+        host = urlsplit(url).netloc
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self.sessions[host] = session
+        return session
+
+    def get(self, z: int, x: int, y: int, headers: dict):
+        """GET with retries. Returns the last response, or None if every attempt failed."""
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # exponential backoff dengan full jitter
+                time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+
+            # shard berikutnya tiap percobaan
+            url = self.tile_url(z, x, y)
+            self.rate_limiter.acquire()
+            try:
+                response = self.session_for(url).get(url, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = e
+                continue
+
+            if response.status_code not in RETRY_STATUS:
+                return response
+            error = f"HTTP {response.status_code}"
+
+        logger.warning(f"Failed to download tile {x},{y} at zoom {z} after {self.retries + 1} attempts: {error}")
+        return None
+
+    def fetch(self, z: int, x: int, y: int):
+        """Download one tile. Returns the response body, or None if the tile could not be fetched."""
+        cached = self.cache.get(z, x, y) if self.cache else None
+        if cached and (cached.fresh or self.offline):
+            return cached.data
+        if self.offline:
+            return None
+
+        headers = {"If-None-Match": cached.etag} if cached and cached.etag else {}
+        response = self.get(z, x, y, headers)
+        if response is None:
+            # tile kadaluarsa tetap lebih baik daripada tidak ada
+            return cached.data if cached else None
+
+        if response.status_code == 304 and cached:
+            self.cache.touch(z, x, y)
+            return cached.data
+        if response.status_code == 200:
+            if self.cache:
+                self.cache.put(z, x, y, response.content, response.headers.get("ETag"))
+            return response.content
+
+        logger.warning(f"Failed to download tile {x},{y} at zoom {z} (HTTP {response.status_code})")
+        return cached.data if cached else None
+
+    def fetch_many(self, z: int, tiles, max_in_flight: int = None):
+        """
+        Fetch (x, y) tiles concurrently and yield ((x, y), content) as they complete. At most
+        max_in_flight tiles (default 2x the workers) are pending at once, which bounds memory.
+        """
+        max_in_flight = max_in_flight or 2 * self.max_workers
+        tiles = iter(tiles)
+        pending = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                for x, y in islice(tiles, max_in_flight - len(pending)):
+                    pending[executor.submit(self.fetch, z, x, y)] = (x, y)
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
@@ -1,17 +1,26 @@
+# url: template XYZ ({x}, {y}, {z}) atau Bing ({quadkey}); {s} = subdomain/shard host
+# subdomains: shard host yang dirotasi antar request
+# rate_limit: batas request per detik per provider (0 = tanpa batas)
 TILE_PROVIDERS = [
   {
     "name": "Google Satellite",
-    "url": "https://mt1.google.com/vt/lyrs=s&x={x}&y={y}&z={z}",
+    "url": "https://mt{s}.google.com/vt/lyrs=s&x={x}&y={y}&z={z}",
+    "subdomains": ["0", "1", "2", "3"],
+    "rate_limit": 50,
     "zoom_level": [str(zoom) for zoom in range(15, 21)]
   },
   {
     "name": "ArcGIS World Imagery",
     "url": "https://services.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}",
+    "subdomains": [],
+    "rate_limit": 30,
     "zoom_level": [str(zoom) for zoom in range(15, 20)]
   },
   {
     "name": "Bing Maps", 
-    "url": "https://t0.tiles.virtualearth.net/tiles/a{quadkey}.jpeg?g=5179",
+    "url": "https://t{s}.tiles.virtualearth.net/tiles/a{quadkey}.jpeg?g=5179",
+    "subdomains": ["0", "1", "2", "3"],
+    "rate_limit": 30,
     "zoom_level": [str(zoom) for zoom in range(15, 20)]
   }
-]
\ No newline at end of file
+]
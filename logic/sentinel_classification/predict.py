@@ -1,17 +1,20 @@
 import os
 import numpy as np
 import rasterio
-from rasterio.windows import Window
 from keras.models import load_model
 from keras.utils import custom_object_scope
-from unet import SwinTransformerBlock
-from train_model import _masked_sparse_categorical_crossentropy
 from PIL import Image
 import geopandas as gpd
 from shapely.geometry import shape
 import rasterio.features
-from constants import LAND_COVER_CLASSES
-from scipy.ndimage import generic_filter
+
+from logic.classification.patch_reader import WindowedPatchReader
+from logic.classification.reconstruction import GeoTiffSink, ProbabilityStripReconstructor, reconstruct
+from logic.inference.engine import InferenceEngine
+from logic.sentinel_classification.unet import SwinTransformerBlock
+from logic.sentinel_classification.train_model import _masked_sparse_categorical_crossentropy
+from logic.sentinel_classification.constants import LAND_COVER_CLASSES, N_CLASSES
+from logic.sentinel_classification.smoothing import majority_filter
 
 # # ================================
 # # 1️⃣ Colormap untuk Mask Berwarna
@@ -56,17 +59,9 @@ def load_unet_model(model_path):
 # 4️⃣ Fungsi Filter Mayoritas (untuk smoothing)
 # ================================
 
-def majority_filter(values):
-    values = values.astype(int)
-    values_no_zero = values[values != 0]
-    if len(values_no_zero) == 0:
-        return values[len(values) // 2]
-    counts = np.bincount(values_no_zero)
-    return np.argmax(counts)
-
 def smooth_mask(mask, size=5):
     print(f"Melakukan smoothing mask dengan kernel size: {size}x{size}")
-    smoothed = generic_filter(mask, majority_filter, size=size, mode='nearest')
+    smoothed = majority_filter(mask, size=size)
     print("Kelas unik setelah smoothing:", np.unique(smoothed))
     return smoothed
 
@@ -74,49 +69,36 @@ def smooth_mask(mask, size=5):
 # 6️⃣ Prediksi Citra
 # ================================
 
-def predict_large_image(image_path, model_path, output_path, tile_size=256):
-    model = load_unet_model(model_path)
-
-    with rasterio.open(image_path) as src:
-        height, width = src.height, src.width
-        channels = src.count
+def predict_batches(engine, reader, batch_size):
+    for positions, batch in reader.batches(batch_size):
+        print(f"Memproses tile {positions[0]} - {positions[-1]}")
+        yield from zip(positions, engine.predict(batch))
 
-        prediction_mask = np.zeros((height, width), dtype=np.uint8)
-
-        for row in range(0, height, tile_size):
-            for col in range(0, width, tile_size):
-                print(f"Memproses tile row={row}, col={col}")
-                window = Window(col_off=col, row_off=row,
-                                width=min(tile_size, width - col),
-                                height=min(tile_size, height - row))
-                
-                image_tile = src.read(window=window)
-                image_tile = np.transpose(image_tile, (1, 2, 0))
-
-                padded = np.zeros((tile_size, tile_size, channels), dtype=image_tile.dtype)
-                padded[:image_tile.shape[0], :image_tile.shape[1], :] = image_tile
-
-                input_tile = np.expand_dims(padded, axis=0)
-                pred_tile = model.predict(input_tile, verbose=0)
-                pred_mask = np.argmax(pred_tile.squeeze(), axis=-1).astype(np.uint8)
+def predict_large_image(image_path, model_path, output_path, tile_size=256, jit_compile=False, overlap=64, batch_size=16, smooth_size=None):
+    model = load_unet_model(model_path)
 
-                pred_mask = pred_mask[:image_tile.shape[0], :image_tile.shape[1]]
-                prediction_mask[row:row + pred_mask.shape[0], col:col + pred_mask.shape[1]] = pred_mask
+    with WindowedPatchReader(image_path, bands=None, patch_size=tile_size, overlap=overlap, stretch=False) as reader:
+        engine = InferenceEngine(model, tile_size, reader.src.count, output="probabilities", jit_compile=jit_compile)
 
-        profile = src.profile
-        profile.update(dtype=rasterio.uint8, count=1, compress='lzw', nodata=0)
+        # probabilitas di-blend per strip setinggi satu tile, baris yang selesai langsung ditulis ke GeoTIFF
+        sink = GeoTiffSink(output_path, reader.src.profile, nodata=0)
+        reconstructor = ProbabilityStripReconstructor(
+            reader.height, reader.width, N_CLASSES, sink, tile_size, overlap, window="hann" if overlap else "flat")
+        reconstruct(predict_batches(engine, reader, batch_size), reconstructor)
 
-        with rasterio.open(output_path, 'w', **profile) as dst:
-            dst.write(prediction_mask, 1)
+    print(f"Hasil prediksi disimpan di: {output_path}")
 
-        print(f"Hasil prediksi disimpan di: {output_path}")
+    with rasterio.open(output_path) as src:
+        prediction_mask = src.read(1)
 
     # output_colored = f"{os.path.splitext(output_path)[0]}_colored.png"
     # save_colored_prediction(prediction_mask, output_colored)
     output_shp = f"{os.path.splitext(output_path)[0]}.shp"
 
-    # Terapkan smoothing sebelum export SHP
-    smoothed_mask = smooth_mask(prediction_mask, size=5)
+    # Terapkan smoothing sebelum export SHP, overlap sudah menghaluskan batas tile
+    if smooth_size is None:
+        smooth_size = 3 if overlap else 5
+    smoothed_mask = smooth_mask(prediction_mask, size=smooth_size) if smooth_size > 1 else prediction_mask
     
     # Validasi kelas akhir (buang kelas tidak valid)
     smoothed_mask[~np.isin(smoothed_mask, [1, 2, 3])] = 0
@@ -159,6 +141,7 @@ def save_shapefile_from_mask(mask, reference_tif, output_shp):
         print(f"Hasil SHP disimpan di: {output_shp}")
 
 if __name__ == "__main__":
+    # python -m logic.sentinel_classification.predict --image-path scene.tif --output-path mask.tif
     import argparse
 
     parser = argparse.ArgumentParser(description="Predict large satellite image using trained U-Net model.")
@@ -166,7 +149,12 @@ if __name__ == "__main__":
     parser.add_argument("--model-path", type=str, default="D:\\samarinda-project\\logic\\sentinel_classification\\unet_model_2025-04-09_12-12-51.keras", help="Path to trained model (.h5).")
     parser.add_argument("--output-path", type=str, required=True, help="Path to save the predicted mask (.tif).")
     parser.add_argument("--tile-size", type=int, default=256, help="Tile size for prediction (default: 256).")
+    parser.add_argument("--jit-compile", action="store_true", help="Compile the forward pass with XLA.")
+    parser.add_argument("--overlap", type=int, default=64, help="Overlap between tiles in pixels (default: 64, 0 = no overlap).")
+    parser.add_argument("--batch-size", type=int, default=16, help="Number of tiles per forward pass (default: 16).")
+    parser.add_argument("--smooth-size", type=int, default=None, help="Majority filter size (default: 3 with overlap, 5 without, 0 = off).")
 
     args = parser.parse_args()
 
-    predict_large_image(args.image_path, args.model_path, args.output_path, args.tile_size)
+    predict_large_image(args.image_path, args.model_path, args.output_path, args.tile_size, args.jit_compile,
+                        args.overlap, args.batch_size, args.smooth_size)
@@ -1,12 +1,14 @@
 from PyQt6.QtCore import pyqtSignal, QThread
-from scipy.ndimage import generic_filter 
-from shapely.geometry import shape
 
 import rasterio
 import numpy as np
-import geopandas as gpd
 
 from .constants import LAND_COVER_CLASSES
+from .smoothing import majority_filter
+from logic.classification.polygonize import polygonize, sieve
+from logic.classification.palette import SENTINEL_PALETTE
+from logic.classification.process_result import save_vector
+from logic.classification.raster_io import write_class_raster
 from utils.logger import setup_logger
 
 logger = setup_logger()
@@ -14,10 +16,14 @@ logger = setup_logger()
 class SentinelImageSaveWorker(QThread):
     error = pyqtSignal(str)
 
-    def __init__(self, mode, output_path, reference_tif: str = None, class_array: np.ndarray = None):
+    def __init__(self, mode, output_path, reference_tif: str = None, class_array: np.ndarray = None, smooth_size: int = 5, cleanup: str = "make_valid", sieve_area: float = 0, raster_profile: str = "cog"):
         super().__init__()
         self.mode = mode  # "vector" or "raster"
         self.output_path = output_path
+        self.smooth_size = smooth_size  # 0 = tanpa smoothing
+        self.raster_profile = raster_profile  # "cog" atau "gtiff"
+        self.cleanup = cleanup  # lihat polygonize.CLEANUP_METHODS
+        self.sieve_area = sieve_area  # luas minimum region (m2), 0 = tanpa sieve
 
         self.class_array = class_array
         self.reference_tif = reference_tif
@@ -36,34 +42,22 @@ class SentinelImageSaveWorker(QThread):
 
     def save_geotiff(self):
         with rasterio.open(self.reference_tif) as src:
-            profile = src.profile
-            profile.update(dtype=rasterio.uint8, count=1, compress='lzw', nodata=0)
+            meta = src.meta.copy()
 
-            with rasterio.open(self.output_path, "w", **profile) as dst:
-                dst.write(self.class_array, 1)
-            logger.info(f"GeoTIFF saved: {self.output_path}")
-
-    def majority_filter(self, values):
-        values = values.astype(int)
-        values_no_zero = values[values != 0]
-        if len(values_no_zero) == 0:
-            return values[len(values) // 2]
-        counts = np.bincount(values_no_zero)
-        return np.argmax(counts)
+        write_class_raster(self.output_path, self.class_array, meta, nodata=0, colors=SENTINEL_PALETTE.colors, profile=self.raster_profile)
 
     def smooth_mask(self, mask, size=5):
         logger.info(f"Melakukan smoothing mask dengan kernel size: {size}x{size}")
-        smoothed = generic_filter(mask, self.majority_filter, size=size, mode='nearest')
-        logger.info("Kelas unik setelah smoothing:", np.unique(smoothed))
+        smoothed = majority_filter(mask, size=size)
+        logger.info(f"Kelas unik setelah smoothing: {np.unique(smoothed)}")
         return smoothed
 
-
     def save_shapefile(self):
         """
         Mengubah mask menjadi SHP dengan mengabaikan kelas tidak valid.
         """
         # Terapkan smoothing sebelum export SHP
-        mask = self.smooth_mask(self.class_array)
+        mask = self.smooth_mask(self.class_array, self.smooth_size) if self.smooth_size > 1 else self.class_array.copy()
         # Validasi kelas akhir (buang kelas tidak valid)
         mask[~np.isin(mask, [1, 2, 3])] = 0
 
@@ -71,28 +65,11 @@ class SentinelImageSaveWorker(QThread):
             transform = src.transform
             crs = src.crs
 
-            shapes = []
-            class_ids = []
-            class_names = []
-
-            for geom, value in rasterio.features.shapes(mask, transform=transform):
-                class_value = int(value)
-                if class_value not in [1, 2, 3]:
-                    continue
-
-                geometry = shape(geom)
-                if geometry.is_valid and geometry.area > 0:
-                    shapes.append(geometry)
-                    class_ids.append(class_value)
-                    class_names.append(LAND_COVER_CLASSES.get(class_value, "UNKNOWN"))
-
-            gdf = gpd.GeoDataFrame({
-                'class_id': class_ids,
-                'class_name': class_names,
-                'geometry': shapes
-            }, crs=crs)
+        if self.sieve_area:
+            mask = sieve(mask, transform, crs, self.sieve_area, nodata=0)
 
-            gdf.to_file(self.output_path)
-            logger.info(f"Hasil SHP disimpan di: {self.output_path}")
+        # kelas 0 (NO_DATA) dan kelas tidak valid sudah bernilai 0, tidak perlu dipoligonkan
+        gdf = polygonize(mask, transform, crs, LAND_COVER_CLASSES, nodata=0, cleanup=self.cleanup)
+        gdf = gdf.rename(columns={"class": "class_id", "label": "class_name"})
 
-    
\ No newline at end of file
+        save_vector(gdf, self.output_path)
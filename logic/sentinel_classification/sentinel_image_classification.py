@@ -2,24 +2,21 @@ from PyQt6.QtCore import QThread, QObject, pyqtSignal
 
 from typing import Optional
 
-import os
 import numpy as np
 import geopandas as gpd
-import rasterio
 import rasterio.features
 
 from PIL import Image
-from rasterio.windows import Window
-from keras.models import load_model
-from keras.utils import custom_object_scope
 from shapely.geometry import shape
 from scipy.ndimage import generic_filter
 
-from .unet import SwinTransformerBlock
-from .train_model import _masked_sparse_categorical_crossentropy
-from .constants import LAND_COVER_CLASSES
+from .constants import LAND_COVER_CLASSES, N_CLASSES
 
-from utils.common import resource_path
+from logic.classification.palette import SENTINEL_PALETTE, preview_image
+from logic.classification.patch_reader import WindowedPatchReader
+from logic.classification.reconstruction import ArraySink, ProbabilityStripReconstructor, reconstruct
+from logic.inference.model_registry import model_registry
+from logic.inference.parallel import ParallelPredictor
 from utils.logger import setup_logger
 
 import numpy as np
@@ -31,78 +28,82 @@ class SentinelImageClassification(QThread):
   error = pyqtSignal(str)
   result = pyqtSignal(dict)
 
-  def __init__(self, image_path: str, tile_size: int = 256, parent: Optional[QObject] = None) -> None:
+  def __init__(
+      self,
+      image_path: str,
+      tile_size: int = 256,
+      overlap: int = 64,
+      backend: str = "keras",
+      precision: str = "float32",
+      batch_size: int = 16,
+      num_workers: int = 0,
+      parent: Optional[QObject] = None
+    ) -> None:
     super().__init__(parent)
 
     self.image_path = image_path
     self.tile_size = tile_size
-
-  def load_unet_model(self, model_path):
-    with custom_object_scope({
-        'SwinTransformerBlock': SwinTransformerBlock,
-        '_masked_sparse_categorical_crossentropy': _masked_sparse_categorical_crossentropy
-    }):
-        return load_model(model_path)            
+    # overlap antar tile; probabilitas di area overlap di-blend sehingga seam berkurang
+    self.overlap = overlap
+    self.backend = backend
+    self.precision = precision
+    self.batch_size = batch_size
+    # > 0: tile dibagi ke beberapa proses (lihat logic/inference/parallel.py)
+    self.num_workers = num_workers
 
   def create_colormap(self):
-      return {
-          0: (0, 0, 0),          # NO_DATA
-          1: (167, 168, 167),    # GROUND
-          2: (46, 15, 15),       # PALMOIL
-          3: (102, 237, 69),     # VEGETASI
-      }
+      return SENTINEL_PALETTE.colors
 
   def colored_prediction(self, prediction_mask):
-      colormap = self.create_colormap()
-      height, width = prediction_mask.shape
-      rgb_image = np.zeros((height, width, 3), dtype=np.uint8)
+      return SENTINEL_PALETTE.encode(prediction_mask)
+
+  def predict_tiles(self, reader, output):
+    for positions, batch in reader.batches(self.batch_size):
+      yield from zip(positions, self.model.predict(batch, output=output))
 
-      for class_idx, color in colormap.items():
-          mask = prediction_mask == class_idx
-          rgb_image[mask] = color
+  def predict_tiles_parallel(self, reader, output):
+    input_shape = (self.tile_size, self.tile_size, len(reader.bands))
+    with ParallelPredictor(
+      "sentinel", input_shape, N_CLASSES, self.batch_size, output,
+      self.backend, self.precision, self.num_workers
+    ) as predictor:
+      yield from predictor.predict(reader.batches(self.batch_size))
 
-      return rgb_image
-      # Image.fromarray(rgb_image).save(output_path_colored)
-      # print(f"Hasil prediksi berwarna disimpan di: {output_path_colored}")
+  def log_progress(self, predictions):
+    for (row, col), prediction in predictions:
+      self.progress.emit(f"Memproses tile row={row}, col={col}")
+      yield (row, col), prediction
 
   def run(self):
     try:
       # model = load_unet_model(resource_path(os.path.join("logic", "sentinel_classification", "unet_model_2025-04-09_12-12-51.keras")))
       self.progress.emit("Memuat model...")
-      self.model = self.load_unet_model(resource_path(os.path.join("logic", "sentinel_classification", "model", "unet_model_2025-04-09_12-12-51.keras")))
+      # mode multi-proses: model dimuat oleh masing-masing worker
+      self.model = None if self.num_workers else model_registry.get("sentinel", self.backend, self.precision)
 
       self.progress.emit("Memuat gambar...")
-      with rasterio.open(self.image_path, 'r') as src:
-        height, width = src.height, src.width
-        channels = src.count
-
-        prediction_mask = np.zeros((height, width), dtype=np.uint8)
-
-        for row in range(0, height, self.tile_size):
-          for col in range(0, width, self.tile_size):
-            self.progress.emit(f"Memproses tile row={row}, col={col}")
-            window = Window(col_off=col, row_off=row,
-                            width=min(self.tile_size, width - col),
-                            height=min(self.tile_size, height - row))
-            
-            image_tile = src.read(window=window)
-            image_tile = np.transpose(image_tile, (1, 2, 0))
-
-            padded = np.zeros((self.tile_size, self.tile_size, channels), dtype=image_tile.dtype)
-            padded[:image_tile.shape[0], :image_tile.shape[1], :] = image_tile
-
-            input_tile = np.expand_dims(padded, axis=0)
-            pred_tile = self.model.predict(input_tile, verbose=0)
-            pred_mask = np.argmax(pred_tile.squeeze(), axis=-1).astype(np.uint8)
-
-            pred_mask = pred_mask[:image_tile.shape[0], :image_tile.shape[1]]
+      with WindowedPatchReader(self.image_path, bands=None, patch_size=self.tile_size, overlap=self.overlap, stretch=False) as reader:
+        height, width = reader.height, reader.width
+        # tanpa overlap cukup argmax per tile, dengan overlap probabilitas di-blend dulu
+        output = "probabilities" if self.overlap else "argmax"
+        predict = self.predict_tiles_parallel if self.num_workers else self.predict_tiles
+        predictions = self.log_progress(predict(reader, output))
+
+        if self.overlap:
+          reconstructor = ProbabilityStripReconstructor(
+            height, width, N_CLASSES, ArraySink(height, width), self.tile_size, self.overlap)
+          prediction_mask = reconstruct(predictions, reconstructor)
+        else:
+          prediction_mask = np.zeros((height, width), dtype=np.uint8)
+          for (row, col), pred_mask in predictions:
+            pred_mask = pred_mask[:height - row, :width - col]
             prediction_mask[row:row + pred_mask.shape[0], col:col + pred_mask.shape[1]] = pred_mask
 
         # self.result.emit(prediction_mask)
         # image: np.ndarray 
         
-        # colorize image for display
-        image = self.colored_prediction(prediction_mask)
+        # colorize image for display (preview diperkecil ke resolusi layar)
+        image, preview_scale = preview_image(prediction_mask, SENTINEL_PALETTE)
         self.progress.emit("Berhasil menyelesaikan proses prediksi...")
 
         self.progress.emit("Proses klasifikasi selesai...")
@@ -112,6 +113,9 @@ class SentinelImageClassification(QThread):
             "meta": 0.0, 
             "class_array": prediction_mask,
             "image": image,
+            "preview_scale": preview_scale,
+            # seam sudah di-blend, smoothing sebelum export SHP cukup dengan kernel kecil
+            "smooth_size": 3 if self.overlap else 5,
         })
     except Exception as e:
       logger.critical(f"Error: {e}")
@@ -0,0 +1,76 @@
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+from scipy.ndimage import correlate1d
+
+def box_count(indicator, size):
+    """Number of set pixels in the size x size window around each pixel (exact integer box sum)."""
+    weights = np.ones(size, dtype=np.uint16)
+    counts = correlate1d(indicator, weights, axis=0, output=np.uint16, mode="nearest")
+    return correlate1d(counts, weights, axis=1, output=np.uint16, mode="nearest")
+
+def majority_filter(mask, size=5):
+    """
+    Mode filter that ignores class 0, equivalent to generic_filter with the old per-pixel
+    majority callback (mode='nearest'): the most frequent non-zero class in the window wins,
+    ties go to the smallest class and windows without any non-zero pixel become 0.
+
+    Counts are built class by class with separable box sums, so memory stays at a few
+    bytes per pixel regardless of the number of classes.
+    """
+    if size > 255:
+        raise ValueError("Ukuran kernel maksimum 255")
+
+    mask = np.asarray(mask)
+    present = np.flatnonzero(np.bincount(mask.ravel(), minlength=1))
+
+    best_count = np.zeros(mask.shape, dtype=np.uint16)
+    best_class = np.zeros(mask.shape, dtype=mask.dtype)
+
+    for class_value in present[present != 0]:
+        counts = box_count((mask == class_value).view(np.uint8), size)
+        # hanya lebih besar (bukan sama dengan) agar seri dimenangkan kelas terkecil
+        better = counts > best_count
+        best_count[better] = counts[better]
+        best_class[better] = class_value
+
+    return best_class
+
+def _tiles(height, width, tile_size, halo):
+    for row in range(0, height, tile_size):
+        for col in range(0, width, tile_size):
+            rows = min(tile_size, height - row)
+            cols = min(tile_size, width - col)
+            # halo dipotong di tepi raster, di sana mode='nearest' sama dengan filter global
+            top, left = max(0, row - halo), max(0, col - halo)
+            bottom, right = min(height, row + rows + halo), min(width, col + cols + halo)
+            yield (row, col, rows, cols), (top, left, bottom, right)
+
+def majority_filter_tiled(mask, size=5, out=None, tile_size=2048):
+    """
+    Tiled majority_filter for arrays that do not fit in RAM (e.g. np.memmap). Each tile is read
+    with a halo of size // 2 pixels, so the result is identical to the untiled filter.
+    """
+    height, width = mask.shape
+    if out is None:
+        out = np.zeros((height, width), dtype=mask.dtype)
+
+    for (row, col, rows, cols), (top, left, bottom, right) in _tiles(height, width, tile_size, size // 2):
+        smoothed = majority_filter(np.asarray(mask[top:bottom, left:right]), size)
+        out[row:row + rows, col:col + cols] = smoothed[row - top:row - top + rows, col - left:col - left + cols]
+    return out
+
+def majority_filter_raster(src_path, dst_path, size=5, tile_size=2048):
+    """Apply majority_filter_tiled to band 1 of a GeoTIFF, window by window."""
+    with rasterio.open(src_path) as src:
+        profile = src.profile
+        with rasterio.open(dst_path, "w", **profile) as dst:
+            for (row, col, rows, cols), (top, left, bottom, right) in _tiles(src.height, src.width, tile_size, size // 2):
+                block = src.read(1, window=Window(left, top, right - left, bottom - top))
+                smoothed = majority_filter(block, size)
+                dst.write(
+                    smoothed[row - top:row - top + rows, col - left:col - left + cols],
+                    1,
+                    window=Window(col, row, cols, rows)
+                )
+    return dst_path
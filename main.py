@@ -3,7 +3,9 @@ from PyQt6.QtWidgets import QApplication, QSplashScreen
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtCore import Qt, QTimer
 from ui.main_window import MainWindow
+from logic.inference.model_registry import ModelWarmupWorker
 from utils.common import resource_path
+import multiprocessing
 import os
 import sys
 
@@ -17,6 +19,8 @@ def show_main_window():
     splash.finish(window)
 
 if __name__ == "__main__":
+    # dibutuhkan worker inferensi multi-proses pada build PyInstaller
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     
     # Splash Screen
@@ -25,6 +29,12 @@ if __name__ == "__main__":
     splash.setMask(splash_pixmap.mask())
     splash.setWindowOpacity(0.9)
     splash.show()
+
+    # Muat model di background selama splash screen tampil
+    if "--no-warmup" not in sys.argv:
+        warmup = ModelWarmupWorker(["satellite"])
+        warmup.finished.connect(warmup.deleteLater)
+        warmup.start()
     
     window = MainWindow()
 
@@ -62,20 +62,17 @@ def extract_patches(image, patch_size=256, overlap=128):
 # 3️⃣ Prediksi Patch
 # ================================
 
-def predict_patched_image(model, image_path, patch_size=256, overlap=128):
+def predict_patched_image(model, image_path, patch_size=256, overlap=128, batch_size=32):
     image, original_size = load_image(image_path)
     patches, positions, padded_size = extract_patches(image, patch_size, overlap)
     
-    predictions = []
+    predictions = np.empty((len(patches), patch_size, patch_size), dtype=np.uint8)
 
-    for patch in patches:
-        patch_input = normalize_image(patch)
-        patch_input = np.expand_dims(patch_input, axis=0)
-        prediction = model.predict(patch_input)
-        predicted_mask = np.argmax(prediction, axis=-1)[0]
-        predictions.append(predicted_mask)
+    for start in range(0, len(patches), batch_size):
+        batch = normalize_image(patches[start:start + batch_size])
+        prediction = model.predict_on_batch(batch)
+        predictions[start:start + len(batch)] = np.argmax(prediction, axis=-1)
 
-    predictions = np.array(predictions)
     reconstructed_mask = reconstruct_from_patches(predictions, positions, padded_size, patch_size, overlap)
 
     return reconstructed_mask[:original_size[0], :original_size[1]]
@@ -147,11 +144,11 @@ def save_result(mask, output_path):
 # ================================
 # 7️⃣ Main Execution
 # ================================
-def main(image_path, log_window):
+def main(image_path, log_window, batch_size=32):
     log_window.log_message("Memuat model...")
     model = load_model('C:\\Users\\dhias\\Documents\\GeoAI\\Samarinda\\samarinda-project\\best_model_fix.h5', compile=False)
     log_window.log_message("Melakukan prediksi...")
-    mask = predict_patched_image(model, image_path)
+    mask = predict_patched_image(model, image_path, batch_size=batch_size)
     log_window.log_message("Menyimpan hasil segmentasi...")
     save_result(mask,'C:\\Users\\dhias\\Documents\\GeoAI\\Samarinda\\samarinda-project\\output\\output.png' )
 
@@ -0,0 +1,44 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+tf = pytest.importorskip("tensorflow")
+pytest.importorskip("PyQt6")
+
+from logic.inference.backends import OnnxBackend, TFLiteBackend
+from logic.inference.engine import InferenceEngine
+from logic.inference.export import convert_onnx, convert_tflite
+
+TILE_SIZE = 32
+NUM_CLASSES = 4
+
+@pytest.fixture(scope="module")
+def model():
+    tf.keras.utils.set_random_seed(0)
+    inputs = tf.keras.Input((TILE_SIZE, TILE_SIZE, 3))
+    x = tf.keras.layers.Conv2D(8, 3, padding="same", activation="relu")(inputs)
+    outputs = tf.keras.layers.Conv2D(NUM_CLASSES, 1, activation="softmax")(x)
+    return tf.keras.Model(inputs, outputs)
+
+@pytest.fixture(scope="module")
+def tiles():
+    return np.random.default_rng(0).random((4, TILE_SIZE, TILE_SIZE, 3), dtype=np.float32)
+
+def assert_parity(model, backend_cls, path, tiles):
+    reference = InferenceEngine(model, TILE_SIZE, output="probabilities").predict(tiles)
+    candidate = backend_cls(path, output="probabilities").predict(tiles)
+    # output dibulatkan ke float16 oleh kedua backend
+    assert np.allclose(reference.astype(np.float32), candidate.astype(np.float32), atol=1e-2)
+
+    reference = InferenceEngine(model, TILE_SIZE, output="argmax").predict(tiles)
+    candidate = backend_cls(path, output="argmax").predict(tiles)
+    assert np.mean(reference == candidate) >= 0.99
+
+def test_tflite_matches_keras(model, tiles, tmp_path):
+    path = convert_tflite(model, str(tmp_path / "model.tflite"))
+    assert_parity(model, TFLiteBackend, path, tiles)
+
+def test_onnx_matches_keras(model, tiles, tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tf2onnx")
+    path = convert_onnx(model, str(tmp_path / "model.onnx"))
+    assert_parity(model, OnnxBackend, path, tiles)
@@ -0,0 +1,24 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from logic.classification.palette import SATELLITE_PALETTE, SENTINEL_PALETTE, UAV_PALETTE, pack_rgb
+
+def test_pack_rgb():
+    rgb = np.array([[[1, 2, 3], [255, 255, 255]]], dtype=np.uint8)
+    keys = pack_rgb(rgb)
+    assert keys.dtype == np.uint32
+    assert keys.tolist() == [[0x010203, 0xFFFFFF]]
+
+@pytest.mark.parametrize("palette", [SATELLITE_PALETTE, UAV_PALETTE, SENTINEL_PALETTE])
+def test_encode_decode_round_trip(palette):
+    class_ids = np.array(sorted(palette.colors), dtype=np.uint8)
+    class_array = np.random.default_rng(0).choice(class_ids, size=(37, 53)).astype(np.uint8)
+
+    decoded = palette.decode(palette.encode(class_array), chunk_rows=8)
+    assert decoded.dtype == np.uint8
+    np.testing.assert_array_equal(decoded, class_array)
+
+def test_decode_unknown_color_is_default_class():
+    rgb = np.array([[[1, 2, 3]]], dtype=np.uint8)
+    assert SATELLITE_PALETTE.decode(rgb)[0, 0] == SATELLITE_PALETTE.default_class
@@ -0,0 +1,30 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+gpd = pytest.importorskip("geopandas")
+pyogrio = pytest.importorskip("pyogrio")
+pytest.importorskip("rasterio")
+
+from shapely.geometry import box
+
+from logic.classification.process_result import VECTOR_DRIVERS, save_vector
+
+def class_polygons(count):
+    return gpd.GeoDataFrame({
+        "class": np.arange(count, dtype=np.uint8),
+        "label": np.array([f"kelas {i}" for i in range(count)], dtype=object),
+        "geometry": [box(i, 0, i + 1, 1) for i in range(count)],
+    }, crs="EPSG:32750")
+
+@pytest.mark.parametrize("ext", sorted(VECTOR_DRIVERS))
+def test_save_empty_gdf(ext, tmp_path):
+    path = str(tmp_path / f"empty.{ext}")
+    save_vector(class_polygons(0), path)
+    assert len(pyogrio.read_dataframe(path)) == 0
+
+@pytest.mark.parametrize("ext", sorted(VECTOR_DRIVERS))
+def test_save_in_chunks(ext, tmp_path):
+    path = str(tmp_path / f"polygons.{ext}")
+    save_vector(class_polygons(5), path, chunk_size=2)
+    result = pyogrio.read_dataframe(path)
+    assert sorted(result["label"]) == [f"kelas {i}" for i in range(5)]
@@ -102,7 +102,7 @@ class Classification(QWidget):
 
         download_shp = FileInputWidget(
             button_name="Download SHP", 
-            filetype=[FileType.SHP.value],
+            filetype=[FileType.SHP.value, FileType.GPKG.value, FileType.FGB.value, FileType.PARQUET.value, FileType.GEOJSON.value],
             file_input_type=FileInputType.FILENAME.value)
         download_shp.path_selected.connect(self.download_shp)
         result_frame.add_widget(download_shp)
@@ -182,7 +182,10 @@ class Classification(QWidget):
             self.graphics_view.load_raster(path=filepath)
         else:
             self.layer.add_item(kwargs.get("layer_name"))
-            self.graphics_view.load_raster(cv_image=kwargs.get("image"), layer=kwargs.get("layer_name"))
+            self.graphics_view.load_raster(
+                cv_image=kwargs.get("image"),
+                layer=kwargs.get("layer_name"),
+                scale=kwargs.get("scale", 1.0))
 
     def remove_image_layer(self, layer_name):
         self.layer.remove_item(layer_name)
@@ -207,14 +210,17 @@ class Classification(QWidget):
                 worker_type="download", 
                 mode="vector", 
                 output_path=path, 
-                gdf=self.result["gdf"])
+                gdf=self.result["gdf"],
+                meta=self.result["meta"],
+                class_array=self.result["class_array"])
         elif self.model_dropdown.get_value == "Sentinel 2":
             self._start_worker(
                 worker_type="download", 
                 mode="vector", 
                 output_path=path, 
                 reference_tif=self.imageInput.get_value,  
-                class_array=self.result["class_array"])
+                class_array=self.result["class_array"],
+                smooth_size=self.result.get("smooth_size", 5))
     
     def download_tif(self, path):
         if self.model_dropdown.get_value == "Citra Satelit" or self.model_dropdown.get_value == "UAV":
@@ -235,7 +241,8 @@ class Classification(QWidget):
     def process_result(self, result):
         params = {
             "layer_name": get_filename(self.temp_output_path, ext=False),
-            "image": result["image"]
+            "image": result["image"],
+            "scale": result.get("preview_scale", 1.0)
         }
         self.add_image_layer(**params)
 
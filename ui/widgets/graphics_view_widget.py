@@ -53,7 +53,7 @@ class GraphicsViewWidget(QWidget):
 
       return image
 
-  def load_raster(self, path: str = None, cv_image: np.ndarray = None, layer: str = "", opacity: float = 1.0):
+  def load_raster(self, path: str = None, cv_image: np.ndarray = None, layer: str = "", opacity: float = 1.0, scale: float = 1.0):
     if path is not None:
       # image = Image.open(path)
       # image_arr = np.array(image)
@@ -77,6 +77,8 @@ class GraphicsViewWidget(QWidget):
 
     item = QGraphicsPixmapItem(pixmap)
     item.setOpacity(opacity)
+    # preview yang diperkecil ditampilkan seukuran raster aslinya
+    item.setScale(scale)
 
     z_value = self.z_values[-1] + 1 if len(self.z_values) else 1
     self.z_values.append(z_value)
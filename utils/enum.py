@@ -21,6 +21,9 @@ class FileType(Enum):
   TIFF = "TIFF Files (*.tif *.tiff)"
   PNG = 'PNG File (*.png *.PNG)'
   SHP = "SHP Files (*.shp *.SHP)"
+  GPKG = "GeoPackage Files (*.gpkg)"
+  FGB = "FlatGeobuf Files (*.fgb)"
+  PARQUET = "GeoParquet Files (*.parquet)"
   JPG = "JPG Files (*.jpg *.jpg)"
 
 class FileInputType(Enum):